@@ -2,5 +2,6 @@ from .agent import BrowserAgent
 from .planner import Planner
 from .memory import Memory
 from .tools import ToolRegistry, ActionResult
+from .observation import Observation
 
-__all__ = ['BrowserAgent', 'Planner', 'Memory', 'ToolRegistry', 'ActionResult']
+__all__ = ['BrowserAgent', 'Planner', 'Memory', 'ToolRegistry', 'ActionResult', 'Observation']
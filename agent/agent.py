@@ -4,13 +4,19 @@ Browser Agent - Main agent loop with reasoning and action execution.
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import uuid
+from typing import Optional, Dict, Any, Iterable
+from collections import deque
 from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
+from urllib.parse import urlparse
+from playwright.async_api import Error as PlaywrightError
 
-from .planner import Planner
+from .planner import Planner, Plan
 from .memory import Memory
 from .tools import ToolRegistry, ActionResult
+from .observation import Observation
 from browser.playwright import BrowserController
 from browser.dom_parser import DOMSnapshot
 from browser.actions import BrowserActions
@@ -33,7 +39,8 @@ class StepResult:
     thought: str
     action: str
     action_params: Dict[str, Any]
-    result: ActionResult
+    success: bool
+    message: str  # Result payloads stay in memory, which keeps only a preview
     screenshot_path: Optional[str] = None
 
 
@@ -49,24 +56,55 @@ class BrowserAgent:
     5. Reflect (evaluate result, adjust if needed)
     """
     
+    # Observation is trimmed to what the planner prompt uses before it
+    # reaches memory or the LLM
+    MAX_PROMPT_ELEMENTS = 30
+    MAX_PROMPT_TEXT = 1000
+    
+    # Actions that don't change the page on success
+    READ_ONLY_ACTIONS = {"wait", "extract", "hover", "scroll_to_element"}
+    
     def __init__(
         self,
         browser: BrowserController,
         model: str = "gpt-4",
-        max_steps: int = 50
+        max_steps: int = 50,
+        step_delay: float = 0.0,
+        ax_hosts: Iterable[str] = ()
     ):
         self.browser = browser
         self.model = model
         self.max_steps = max_steps
+        self.step_delay = step_delay
+        # Sites with good a11y markup, observed via the accessibility tree
+        self.ax_hosts = frozenset(ax_hosts)
         
         self.memory = Memory()
         self.planner = Planner(model=model)
         self.actions = BrowserActions(browser)
         self.tools = ToolRegistry()
         
+        # Registered tool name -> bound BrowserActions method
+        self._action_dispatch = {
+            name: getattr(self.actions, name)
+            for name in self.tools.list_tools()
+            if hasattr(self.actions, name)
+        }
+        
         self.state = AgentState.IDLE
         self.current_task: Optional[str] = None
-        self.step_history: list[StepResult] = []
+        self.step_history: deque[StepResult] = deque(maxlen=max_steps)
+        self._last_dom_hash: Optional[int] = None
+        self._last_snapshot: Optional[DOMSnapshot] = None  # Reused while the DOM is unchanged
+        self._skipped_planner = False
+        # Prefixes screenshot names so pooled agents and repeated runs don't
+        # overwrite each other's files; renewed by run()
+        self._run_id = uuid.uuid4().hex[:8]
+        
+        # Step recording runs in a background consumer; run() creates both on
+        # the running loop (a queue binds to the first loop that uses it)
+        self._bookkeeping_q: Optional[asyncio.Queue] = None
+        self._bookkeeper_task: Optional[asyncio.Task] = None
         
     async def run(self, task: str) -> Dict[str, Any]:
         """
@@ -81,27 +119,57 @@ class BrowserAgent:
         self.current_task = task
         self.state = AgentState.THINKING
         self.memory.set_goal(task)
+        self._run_id = uuid.uuid4().hex[:8]
         
         logger.info(f"Starting task: {task}")
         
+        self._bookkeeping_q = asyncio.Queue()
+        self._bookkeeper_task = asyncio.create_task(self._bookkeeper(self._bookkeeping_q))
+        
         step = 0
+        next_observation: Optional[asyncio.Task] = None
         while step < self.max_steps:
             step += 1
             logger.info(f"=== Step {step}/{self.max_steps} ===")
+            # One timestamp for everything recorded during this step
+            step_ts = datetime.now()
             
             try:
-                # 1. Observe current state
-                observation = await self._observe()
-                self.memory.add_observation(observation)
+                # 1. Observe current state (prefetched at the end of the previous step)
+                if next_observation is not None:
+                    # Detach first so a failed prefetch isn't awaited again next step
+                    prefetched, next_observation = next_observation, None
+                    observation = await prefetched
+                else:
+                    observation = await self._observe(step)
+                self.memory.add_observation(observation, timestamp=step_ts)
                 
-                # 2. Think and Plan
+                # 2. Think and Plan - memory must reflect every recorded step first
+                await self._bookkeeping_q.join()
                 self.state = AgentState.THINKING
-                plan = await self.planner.plan(
-                    task=task,
-                    observation=observation,
-                    memory=self.memory.get_context(),
-                    available_tools=self.tools.get_schema()
-                )
+                if self._awaiting_render(observation):
+                    # Same DOM right after a successful click/type: the effect is
+                    # most likely still loading, so wait rather than re-plan
+                    plan = Plan(
+                        thought="Page unchanged after the last action, waiting for it to update",
+                        action="wait",
+                        params={},
+                        confidence=1.0,
+                        alternatives=[]
+                    )
+                    self._skipped_planner = True
+                else:
+                    plan = await self.planner.plan(
+                        task=task,
+                        observation=observation,
+                        memory=self.memory.get_context(),
+                        available_tools=self.tools.get_schema()
+                    )
+                    self._skipped_planner = False
+                self._last_dom_hash = observation.dom_hash
+                # The planner is done with the DOM - let it go before acting
+                # (the snapshot lives on in _last_snapshot until the next capture)
+                observation.release()
                 
                 logger.info(f"Thought: {plan.thought}")
                 logger.info(f"Action: {plan.action} with params: {plan.params}")
@@ -110,58 +178,129 @@ class BrowserAgent:
                 if plan.action == "complete":
                     self.state = AgentState.COMPLETED
                     logger.info("Task marked as completed by agent")
-                    return self._create_result(success=True, reason=plan.thought)
+                    return await self._finish(success=True, reason=plan.thought)
                 
                 # 3. Execute action
                 self.state = AgentState.ACTING
                 result = await self._execute_action(plan.action, plan.params)
                 
-                # Record step
+                # Let navigations settle instead of sleeping after every step
+                if result.data and result.data.get("needs_settle"):
+                    await self._wait_for_settle()
+                
+                if self.step_delay:
+                    await asyncio.sleep(self.step_delay)
+                
+                # Start observing for the next step while this one is recorded
+                if step < self.max_steps:
+                    next_observation = asyncio.create_task(self._observe(step + 1))
+                
+                # Record step (off the hot path, overlapping the next observation)
                 step_result = StepResult(
                     step_number=step,
                     thought=plan.thought,
                     action=plan.action,
                     action_params=plan.params,
-                    result=result
+                    success=result.success,
+                    message=result.message,
+                    screenshot_path=observation.screenshot_path
                 )
-                self.step_history.append(step_result)
-                self.memory.add_action(plan.action, plan.params, result)
-                
-                # Small delay between steps
-                await asyncio.sleep(0.5)
+                self._bookkeeping_q.put_nowait((step_result, plan, result, step_ts))
             
             except Exception as e:
                 logger.error(f"Error in step {step}: {e}", exc_info=True)
-                self.memory.add_error(str(e))
+                await self._bookkeeping_q.join()
+                self.memory.add_error(str(e), timestamp=step_ts)
                 
                 if self._should_abort(e):
+                    if next_observation is not None:
+                        next_observation.cancel()
                     self.state = AgentState.FAILED
-                    return self._create_result(success=False, reason=str(e))
+                    return await self._finish(success=False, reason=str(e))
         
         # Max steps reached
         self.state = AgentState.FAILED
         logger.warning(f"Max steps ({self.max_steps}) reached without completing task")
-        return self._create_result(success=False, reason="Max steps reached")
+        return await self._finish(success=False, reason="Max steps reached")
+    
+    async def _bookkeeper(self, queue: asyncio.Queue):
+        """Record completed steps into history and memory, one at a time."""
+        while True:
+            step_result, plan, result, timestamp = await queue.get()
+            try:
+                self.step_history.append(step_result)
+                self.memory.add_action(plan.action, plan.params, result, timestamp=timestamp)
+            except Exception as e:
+                logger.error(f"Failed to record step {step_result.step_number}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
     
-    async def _observe(self) -> Dict[str, Any]:
+    async def _finish(self, success: bool, reason: str) -> Dict[str, Any]:
+        """Flush pending bookkeeping, stop the consumer and build the result."""
+        await self._bookkeeping_q.join()
+        if self._bookkeeper_task is not None:
+            self._bookkeeper_task.cancel()
+            self._bookkeeper_task = None
+        self._bookkeeping_q = None
+        return self._create_result(success=success, reason=reason)
+    
+    async def _observe(self, step: int = 0) -> Observation:
         """Capture current browser state."""
-        dom_snapshot = await DOMSnapshot.capture(self.browser.page)
-        screenshot = await self.browser.screenshot()
-        url = self.browser.page.url
-        title = await self.browser.page.title()
-        
-        return {
-            "url": url,
-            "title": title,
-            "dom": dom_snapshot.to_simplified_json(),
-            "interactive_elements": dom_snapshot.get_interactive_elements(),
-            "visible_text": dom_snapshot.get_visible_text(),
-            "screenshot": screenshot
-        }
+        page = self.browser.page
+        screenshot_name = f"{self._run_id}_step_{step}.png"
+
+        # Independent reads - issue them together instead of paying two round trips
+        results = await asyncio.gather(
+            self._capture_dom(page),
+            self.browser.screenshot(path=screenshot_name, return_base64=False),
+            return_exceptions=True
+        )
+
+        if any(isinstance(r, Exception) for r in results):
+            # Re-run sequentially so the real error surfaces to run()/_should_abort
+            dom_snapshot = await self._capture_dom(page)
+            await self.browser.screenshot(path=screenshot_name, return_base64=False)
+        else:
+            dom_snapshot = results[0]
+        self._last_snapshot = dom_snapshot
+
+        url = page.url
+
+        return Observation(
+            url=url,
+            title=dom_snapshot.page_info["title"],  # Read by the capture itself
+            dom=dom_snapshot.to_simplified_json(),
+            interactive_elements=dom_snapshot.get_interactive_elements(
+                limit=self.MAX_PROMPT_ELEMENTS,
+                importance_filter=True
+            ),
+            visible_text=dom_snapshot.get_visible_text(max_length=self.MAX_PROMPT_TEXT),
+            dom_hash=dom_snapshot.fingerprint(),
+            screenshot_path=str(self.browser.screenshot_dir / screenshot_name),
+            snapshot=dom_snapshot
+        )
+    
+    async def _capture_dom(self, page) -> DOMSnapshot:
+        """Snapshot the page, from the accessibility tree on the configured sites."""
+        if self.ax_hosts and urlparse(page.url).hostname in self.ax_hosts:
+            snapshot = await DOMSnapshot.capture_ax(page)
+            if snapshot.get_interactive_elements(limit=1):
+                return snapshot
+            # Nothing actionable in the tree - poor markup, use the DOM walk
+        return await DOMSnapshot.capture(page, prev=self._last_snapshot)
+    
+    def _awaiting_render(self, observation: Observation) -> bool:
+        """Check if the planner call can be skipped in favour of a wait."""
+        if self._skipped_planner or not self.step_history:
+            return False
+        if observation.dom_hash != self._last_dom_hash:
+            return False
+        last = self.step_history[-1]
+        return last.success and last.action not in self.READ_ONLY_ACTIONS
     
     async def _execute_action(self, action: str, params: Dict[str, Any]) -> ActionResult:
         """Execute a browser action."""
-        action_method = getattr(self.actions, action, None)
+        action_method = self._action_dispatch.get(action)
         
         if action_method is None:
             return ActionResult(
@@ -170,16 +309,25 @@ class BrowserAgent:
                 data=None
             )
         
+        # Actions report their own failures via ActionResult; what's left is
+        # Playwright errors escaping them and bad parameters from the LLM
         try:
             result = await action_method(**params)
             return result
-        except Exception as e:
+        except (PlaywrightError, TypeError) as e:
             return ActionResult(
                 success=False,
                 message=f"Action failed: {str(e)}",
                 data=None
             )
     
+    async def _wait_for_settle(self, timeout: int = 500):
+        """Briefly wait for network activity to calm down after a navigation."""
+        try:
+            await self.browser.page.wait_for_load_state("networkidle", timeout=timeout)
+        except Exception:
+            pass  # Busy pages never go idle - move on
+    
     def _should_abort(self, error: Exception) -> bool:
         """Determine if the agent should abort due to an error."""
         critical_errors = [
@@ -203,7 +351,7 @@ class BrowserAgent:
                     "thought": s.thought,
                     "action": s.action,
                     "params": s.action_params,
-                    "success": s.result.success
+                    "success": s.success
                 }
                 for s in self.step_history
             ]
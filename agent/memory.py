@@ -2,17 +2,25 @@
 Memory - Short-term and long-term memory management for the agent.
 """
 
+import heapq
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import weakref
+from typing import Dict, Any, List, Optional, Set
 from dataclasses import dataclass, field
 from datetime import datetime
-from collections import deque
+from collections import deque, defaultdict
+from itertools import islice
+
+from .observation import Observation
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"\w+")
+
 
-@dataclass
+@dataclass(slots=True)
 class MemoryItem:
     """Single memory item with metadata."""
     content: Any
@@ -20,9 +28,35 @@ class MemoryItem:
     timestamp: datetime = field(default_factory=datetime.now)
     importance: float = 0.5  # 0-1 scale
     tags: List[str] = field(default_factory=list)
+    item_id: int = 0
+    content_preview: str = field(default="", init=False, repr=False)
+    _content_lower: str = field(default="", init=False, repr=False)
+    _tag_set: frozenset = field(default=frozenset(), init=False, repr=False)
+    
+    def __post_init__(self):
+        # Stringified once here rather than on every search/get_context
+        content_str = str(self.content)
+        self.content_preview = content_str[:200]
+        self._content_lower = content_str.lower()
+        self._tag_set = frozenset(t.lower() for t in self.tags)
+        
+    def tokens(self) -> Set[str]:
+        """Search tokens for this item (content words, tags and tag words)."""
+        words = set(_TOKEN_RE.findall(self._content_lower))
+        for tag in self._tag_set:
+            words.update(_TOKEN_RE.findall(tag))
+        return words | self._tag_set
+    
+    def matches(self, query_lower: str) -> bool:
+        """Substring match against content and tags."""
+        return (
+            query_lower in self._content_lower
+            or query_lower in self._tag_set
+            or any(query_lower in tag for tag in self._tag_set)
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class ActionMemory:
     """Memory of an executed action."""
     action: str
@@ -30,6 +64,10 @@ class ActionMemory:
     result: Any
     success: bool
     timestamp: datetime = field(default_factory=datetime.now)
+    result_preview: Optional[str] = field(default=None, init=False, repr=False)
+    
+    def __post_init__(self):
+        self.result_preview = str(self.result)[:100] if self.result else None
 
 
 class Memory:
@@ -51,21 +89,30 @@ class Memory:
         # Short-term memory (FIFO queue)
         self.short_term: deque[MemoryItem] = deque(maxlen=short_term_capacity)
         
-        # Long-term memory (important items)
-        self.long_term: List[MemoryItem] = []
+        # Long-term memory (important items) - min-heap of (importance, item_id, item)
+        # so the least important entry is evicted in O(log N); item_id breaks ties
+        self.long_term: List[tuple] = []
         
         # Structured storage
         self.goal: Optional[str] = None
         self.sub_goals: List[str] = []
         self.actions_history: List[ActionMemory] = []
+        # Maintained on insert so success-rate/pattern queries don't rescan history
+        self._success_window: deque[int] = deque(maxlen=100)
+        self._actions_by_type: Dict[str, List[ActionMemory]] = defaultdict(list)
         self.observations_cache: deque[Dict[str, Any]] = deque(maxlen=5)
         self.errors: List[str] = []
         self.notes: List[str] = []
         self.reflections: List[Dict[str, Any]] = []
         
-        # Semantic index for retrieval (simplified)
+        # Semantic index for retrieval (simplified) - tag -> item ids
         self.semantic_index: Dict[str, List[int]] = {}
         
+        # Inverted token index over live items (short- and long-term) for search
+        self._next_id = 0
+        self._by_id: Dict[int, MemoryItem] = {}
+        self._token_index: Dict[str, Set[int]] = {}
+        
     def set_goal(self, goal: str):
         """Set the main goal/task."""
         self.goal = goal
@@ -86,34 +133,51 @@ class Memory:
             tags=["sub_goal"]
         )
         
-    def add_observation(self, observation: Dict[str, Any]):
+    def add_observation(self, observation: Observation, timestamp: Optional[datetime] = None):
         """Add a browser observation to memory."""
-        # Cache recent observations
-        self.observations_cache.append(observation)
-        
-        # Add summarized version to short-term
         summary = {
-            "url": observation.get("url"),
-            "title": observation.get("title"),
-            "element_count": len(observation.get("interactive_elements", []))
+            "url": observation.url,
+            "title": observation.title,
+            "element_count": len(observation.interactive_elements)
         }
         
+        # Cache only cheap metadata - the DOM is held weakly and the screenshot
+        # lives on disk, so old observations don't pin large buffers
+        snapshot = observation.snapshot
+        self.observations_cache.append({
+            **summary,
+            "screenshot_path": observation.screenshot_path,
+            "dom_ref": weakref.ref(snapshot) if snapshot is not None else None
+        })
+        
+        # Add summarized version to short-term
         self._add_to_short_term(
             content=summary,
             item_type="observation",
             importance=0.5,
-            tags=["observation", "page"]
+            tags=["observation", "page"],
+            timestamp=timestamp
         )
         
-    def add_action(self, action: str, params: Dict[str, Any], result: Any):
+    def add_action(
+        self,
+        action: str,
+        params: Dict[str, Any],
+        result: Any,
+        timestamp: Optional[datetime] = None
+    ):
         """Record an executed action."""
+        timestamp = timestamp or datetime.now()
         action_memory = ActionMemory(
             action=action,
             params=params,
             result=result,
-            success=getattr(result, 'success', True)
+            success=getattr(result, 'success', True),
+            timestamp=timestamp
         )
         self.actions_history.append(action_memory)
+        self._success_window.append(1 if action_memory.success else 0)
+        self._actions_by_type[action].append(action_memory)
         
         # Important failed actions should be remembered longer
         importance = 0.7 if action_memory.success else 0.9
@@ -126,15 +190,17 @@ class Memory:
             },
             item_type="action",
             importance=importance,
-            tags=["action", action]
+            tags=["action", action],
+            timestamp=timestamp
         )
         
     def add_reflection(self, reflection: Any):
         """Add a reflection/self-correction note."""
+        timestamp = datetime.now()
         reflection_dict = {
             "content": reflection.content if hasattr(reflection, 'content') else str(reflection),
             "adjustment": getattr(reflection, 'adjustment', None),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp.isoformat()
         }
         self.reflections.append(reflection_dict)
         
@@ -142,7 +208,8 @@ class Memory:
             content=reflection_dict,
             item_type="reflection",
             importance=0.85,
-            tags=["reflection", "learning"]
+            tags=["reflection", "learning"],
+            timestamp=timestamp
         )
         
         # Reflections are usually important - consider for long-term
@@ -150,10 +217,11 @@ class Memory:
             self._promote_to_long_term(
                 content=reflection_dict,
                 item_type="reflection",
-                importance=0.9
+                importance=0.9,
+                timestamp=timestamp
             )
             
-    def add_error(self, error: str):
+    def add_error(self, error: str, timestamp: Optional[datetime] = None):
         """Record an error for debugging."""
         self.errors.append(error)
         
@@ -161,7 +229,8 @@ class Memory:
             content=error,
             item_type="error",
             importance=0.8,
-            tags=["error"]
+            tags=["error"],
+            timestamp=timestamp
         )
         
     def add_note(self, note: str, importance: float = 0.6):
@@ -186,7 +255,7 @@ class Memory:
                 "action": a.action,
                 "params": a.params,
                 "success": a.success,
-                "result": str(a.result)[:100] if a.result else None
+                "result": a.result_preview
             }
             for a in self.actions_history[-5:]
         ]
@@ -195,11 +264,7 @@ class Memory:
         recent_items = list(self.short_term)[-max_items:]
         
         # Get important long-term items
-        important_long_term = sorted(
-            self.long_term,
-            key=lambda x: x.importance,
-            reverse=True
-        )[:3]
+        important_long_term = [entry[2] for entry in heapq.nlargest(3, self.long_term)]
         
         return {
             "goal": self.goal,
@@ -213,7 +278,7 @@ class Memory:
             "reflections": self.reflections[-3:],
             "errors": self.errors[-3:],
             "important_memories": [
-                {"type": item.item_type, "content": str(item.content)[:200]}
+                {"type": item.item_type, "content": item.content_preview}
                 for item in important_long_term
             ]
         }
@@ -221,41 +286,55 @@ class Memory:
     def search(self, query: str, limit: int = 5) -> List[MemoryItem]:
         """
         Search memory for relevant items.
-        Simple keyword-based search (can be enhanced with embeddings).
+        Substring search narrowed by the inverted token index (can be enhanced with embeddings).
         """
         query_lower = query.lower()
-        results = []
+        # A query word with a non-word character on both sides can only match
+        # a whole indexed token, so those words prove where a match can be.
+        # Edge words may be partial ("nav" in "navigation") and prove nothing.
+        inner_tokens = _TOKEN_RE.findall(query_lower)
+        if _TOKEN_RE.match(query_lower[:1]):
+            inner_tokens = inner_tokens[1:]
+        if _TOKEN_RE.match(query_lower[-1:]):
+            inner_tokens = inner_tokens[:-1]
         
-        # Search short-term
-        for item in self.short_term:
-            content_str = str(item.content).lower()
-            if query_lower in content_str or any(query_lower in tag for tag in item.tags):
-                results.append(item)
-                
-        # Search long-term
-        for item in self.long_term:
-            content_str = str(item.content).lower()
-            if query_lower in content_str or any(query_lower in tag for tag in item.tags):
-                results.append(item)
+        if inner_tokens:
+            candidates = set.intersection(*(
+                self._token_index.get(t, set()) for t in inner_tokens
+            ))
+            items = (self._by_id[i] for i in candidates)
+        else:
+            items = self._by_id.values()
+        # The index only narrows the scan - the whole query must still match
+        results = [item for item in items if item.matches(query_lower)]
         
         # Sort by importance and recency
         results.sort(key=lambda x: (x.importance, x.timestamp), reverse=True)
         
         return results[:limit]
     
+    def get_by_tag(self, tag: str) -> List[MemoryItem]:
+        """Get live short-term items carrying a tag, oldest first."""
+        return [self._by_id[i] for i in self.semantic_index.get(tag, [])]
+    
     def get_action_pattern(self, action_type: str) -> List[ActionMemory]:
         """Get history of a specific action type for pattern analysis."""
-        return [a for a in self.actions_history if a.action == action_type]
+        return list(self._actions_by_type.get(action_type, ()))
     
     def get_success_rate(self, last_n: int = 10) -> float:
         """Calculate recent action success rate."""
-        recent = self.actions_history[-last_n:]
+        if last_n > self._success_window.maxlen:
+            recent = [1 if a.success else 0 for a in self.actions_history[-last_n:]]
+        else:
+            recent = list(islice(reversed(self._success_window), last_n))
         if not recent:
             return 1.0
-        return sum(1 for a in recent if a.success) / len(recent)
+        return sum(recent) / len(recent)
     
     def clear_short_term(self):
         """Clear short-term memory (useful for new task)."""
+        for item in self.short_term:
+            self._unindex(item)
         self.short_term.clear()
         self.observations_cache.clear()
         
@@ -264,41 +343,79 @@ class Memory:
         content: Any,
         item_type: str,
         importance: float = 0.5,
-        tags: List[str] = None
+        tags: List[str] = None,
+        timestamp: Optional[datetime] = None
     ):
         """Add item to short-term memory."""
+        if len(self.short_term) == self.short_term.maxlen:
+            # The deque is about to drop its oldest item
+            self._unindex(self.short_term[0])
+            
         item = MemoryItem(
             content=content,
             item_type=item_type,
             importance=importance,
-            tags=tags or []
+            tags=tags or [],
+            item_id=self._next_id,
+            timestamp=timestamp or datetime.now()
         )
+        self._next_id += 1
         self.short_term.append(item)
+        self._index(item)
         
         # Index for retrieval
         for tag in item.tags:
             if tag not in self.semantic_index:
                 self.semantic_index[tag] = []
-            self.semantic_index[tag].append(len(self.short_term) - 1)
+            self.semantic_index[tag].append(item.item_id)
             
     def _promote_to_long_term(
         self,
         content: Any,
         item_type: str,
-        importance: float = 0.7
+        importance: float = 0.7,
+        timestamp: Optional[datetime] = None
     ):
         """Promote an important item to long-term memory."""
-        if len(self.long_term) >= self.long_term_capacity:
-            # Remove least important item
-            self.long_term.sort(key=lambda x: x.importance)
-            self.long_term.pop(0)
-            
         item = MemoryItem(
             content=content,
             item_type=item_type,
-            importance=importance
+            importance=importance,
+            item_id=self._next_id,
+            timestamp=timestamp or datetime.now()
         )
-        self.long_term.append(item)
+        self._next_id += 1
+        entry = (item.importance, item.item_id, item)
+        
+        if len(self.long_term) >= self.long_term_capacity:
+            # Replace least important item
+            _, _, evicted = heapq.heapreplace(self.long_term, entry)
+            self._unindex(evicted)
+        else:
+            heapq.heappush(self.long_term, entry)
+        self._index(item)
+        
+    def _index(self, item: MemoryItem):
+        """Add an item to the search index."""
+        self._by_id[item.item_id] = item
+        for token in item.tokens():
+            self._token_index.setdefault(token, set()).add(item.item_id)
+            
+    def _unindex(self, item: MemoryItem):
+        """Remove an evicted item from the search index."""
+        self._by_id.pop(item.item_id, None)
+        for token in item.tokens():
+            postings = self._token_index.get(token)
+            if postings is not None:
+                postings.discard(item.item_id)
+                if not postings:
+                    del self._token_index[token]
+        for tag in item.tags:
+            ids = self.semantic_index.get(tag)
+            if ids and item.item_id in ids:
+                ids.remove(item.item_id)
+                if not ids:
+                    del self.semantic_index[tag]
         
     def export(self) -> Dict[str, Any]:
         """Export memory state for persistence."""
@@ -0,0 +1,32 @@
+"""
+Observation - Snapshot of the browser state taken at the start of a step.
+"""
+
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+
+from browser.dom_parser import DOMSnapshot
+
+
+@dataclass(slots=True)
+class Observation:
+    """Browser state handed to the planner and memory for one step."""
+    url: str
+    title: str
+    interactive_elements: List[Dict[str, Any]] = field(default_factory=list)
+    visible_text: str = ""
+    dom_hash: Optional[int] = None
+    screenshot_path: Optional[str] = None
+    dom: Optional[Dict[str, Any]] = None  # Simplified DOM JSON
+    snapshot: Optional[DOMSnapshot] = None
+    
+    def release(self):
+        """
+        Drop this observation's DOM buffers once the planner has consumed them.
+        
+        The simplified DOM is freed. The snapshot itself stays alive until
+        the next capture, because the agent keeps the latest one to reuse
+        while the page is unchanged.
+        """
+        self.dom = None
+        self.snapshot = None
@@ -2,16 +2,54 @@
 Planner - LLM-based reasoning and action planning.
 """
 
+import asyncio
 import json
 import logging
+import weakref
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from openai import AsyncOpenAI
 
-from .prompt import SystemPrompts
+from .prompt import SystemPrompts, PromptCache, CacheStats
+from .observation import Observation
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# One client (and HTTP connection pool) shared by every planner on an event
+# loop; the pool is bound to the loop it was created on. Keyed weakly so a
+# finished asyncio.run() doesn't keep its client alive.
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_client() -> AsyncOpenAI:
+    """Get the OpenAI client shared on the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None:
+        client = _shared_clients[loop] = AsyncOpenAI()
+    return client
+
+
+def _json_loads(data):
+    """Parse JSON from tool-call arguments / model output."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj, indent: Optional[int] = None) -> str:
+    """Serialize to a JSON string (orjson only supports 2-space indentation)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    return json.dumps(obj, indent=indent)
+
 
 @dataclass
 class Plan:
@@ -32,15 +70,32 @@ class Planner:
     - Available tools/actions
     """
     
-    def __init__(self, model: str = "gpt-4o-mini"):
+    PROVIDER = "openai"
+    
+    def __init__(self, model: str = "gpt-4o-mini", client: Optional[AsyncOpenAI] = None):
         self.model = model
-        self.client = AsyncOpenAI()
+        # None: use the shared client of whichever loop is running the call
+        self._client = client
+        # Last (source schema list, enhanced tools) - the registry hands out
+        # the same list until a tool is registered, so one entry is enough
+        self._tools_cache: Optional[tuple] = None
+        # Static task message - identical on every step of a run
+        self._task_prompt: Optional[tuple] = None
+        # Responses to byte-identical prompts (same page, task and history)
+        self._response_cache = PromptCache()
+        # Provider-side prompt cache effectiveness, from response usage
+        self.cache_stats = CacheStats()
         logger.info(f"Planner initialized with model: {self.model}")
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The OpenAI client (call from inside the event loop making the request)."""
+        return self._client or _get_client()
         
     async def plan(
         self,
         task: str,
-        observation: Dict[str, Any],
+        observation: Observation,
         memory: Dict[str, Any],
         available_tools: List[Dict[str, Any]]
     ) -> Plan:
@@ -57,35 +112,60 @@ class Planner:
             Plan object with thought process and action
         """
         
+        planning_tools = self._get_planning_tools(available_tools)
+        tool_names = [t["function"]["name"] for t in planning_tools]
+        
         # Build the planning prompt
-        system_prompt = SystemPrompts.PLANNER_SYSTEM
+        system_prompt = SystemPrompts.build_planner(tool_names, provider=self.PROVIDER)
         
+        # Static content first, per-step state last, so consecutive steps
+        # share the longest possible prefix for provider prompt caching
+        task_prompt = self._build_task_prompt(task)
         user_prompt = self._build_user_prompt(
-            task=task,
             observation=observation,
             memory=memory,
             available_tools=available_tools
         )
         
-        # Call LLM with function calling
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            tools=self._get_planning_tools(available_tools),
-            tool_choice="required",
-            temperature=0.2
+        cache_key = PromptCache.make_key(
+            self.model,
+            SystemPrompts.build_planner(tool_names),
+            task_prompt,
+            user_prompt
         )
         
+        # Call LLM with function calling
+        async def call_llm():
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": task_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                tools=planning_tools,
+                tool_choice="required",
+                temperature=0.2
+            )
+            self.cache_stats.record(self.PROVIDER, getattr(response, "usage", None))
+            return response
+        
+        recent_actions = memory.get("recent_actions")
+        if recent_actions and not recent_actions[-1].get("success", True):
+            # Failures repeat the same prompt, so a cached plan may be the one
+            # that just failed - resample and replace it
+            response = await call_llm()
+            self._response_cache.put(cache_key, response)
+        else:
+            response = await self._response_cache.get_or_call(cache_key, call_llm)
+        
         # Parse response
         message = response.choices[0].message
         
         if message.tool_calls:
             tool_call = message.tool_calls[0]
             action = tool_call.function.name
-            params = json.loads(tool_call.function.arguments)
+            params = _json_loads(tool_call.function.arguments)
             
             # Extract thought from the content or params
             thought = params.pop("thought", "") or message.content or "Proceeding with action"
@@ -108,17 +188,32 @@ class Planner:
             alternatives=[]
         )
     
+    def _build_task_prompt(self, task: str) -> str:
+        """Build the static part of the prompt (unchanged for the whole run)."""
+        if self._task_prompt is not None and self._task_prompt[0] == task:
+            return self._task_prompt[1]
+        
+        prompt = f"""
+## Current Task
+{task}
+
+Decide the SINGLE BEST next action to progress toward completing the task,
+based on the current page state in the next message.
+Think step by step about what you see and what action would be most effective.
+"""
+        self._task_prompt = (task, prompt)
+        return prompt
+    
     def _build_user_prompt(
         self,
-        task: str,
-        observation: Dict[str, Any],
+        observation: Observation,
         memory: Dict[str, Any],
         available_tools: List[Dict[str, Any]]
     ) -> str:
-        """Build the user prompt for the planner."""
+        """Build the per-step part of the prompt for the planner."""
         
-        # Summarize interactive elements (limit to avoid token overflow)
-        elements = observation.get("interactive_elements", [])[:30]
+        # Interactive elements and visible text arrive already trimmed by the agent
+        elements = observation.interactive_elements
         elements_str = "\n".join([
             f"[{i}] {el.get('tag', 'unknown')} - {el.get('text', '')[:50]} "
             f"(id={el.get('id', '')}, class={el.get('class', '')[:30]})"
@@ -133,36 +228,34 @@ class Planner:
         ])
         
         prompt = f"""
-## Current Task
-{task}
-
 ## Current Page
-URL: {observation.get('url', 'unknown')}
-Title: {observation.get('title', 'unknown')}
+URL: {observation.url or 'unknown'}
+Title: {observation.title or 'unknown'}
 
 ## Interactive Elements on Page
 {elements_str}
 
 ## Visible Text (truncated)
-{observation.get('visible_text', '')[:1000]}
+{observation.visible_text}
 
 ## Recent Actions Taken
 {actions_str if actions_str else 'No actions yet'}
 
 ## Memory Notes
 {memory.get('notes', 'None')}
-
-Based on the above, decide the SINGLE BEST next action to progress toward completing the task.
-Think step by step about what you see and what action would be most effective.
 """
         return prompt
     
     def _get_planning_tools(self, available_tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Convert available tools to OpenAI function calling format."""
+        cached = self._tools_cache
+        if cached is not None and cached[0] is available_tools:
+            return cached[1]
         
-        # Add thought and confidence to each tool
+        # Add thought and confidence to each tool; sorted so the payload
+        # is byte-identical regardless of registration order
         tools = []
-        for tool in available_tools:
+        for tool in sorted(available_tools, key=lambda t: t["name"]):
             enhanced_tool = {
                 "type": "function",
                 "function": {
@@ -187,6 +280,7 @@ Think step by step about what you see and what action would be most effective.
             }
             tools.append(enhanced_tool)
         
+        self._tools_cache = (available_tools, tools)
         return tools
 
 
@@ -198,17 +292,30 @@ class ReActPlanner(Planner):
     - Observation processing
     """
     
+    def __init__(self, model: str = "gpt-4o-mini", client: Optional[AsyncOpenAI] = None):
+        super().__init__(model=model, client=client)
+        # Last (observation key, thought) - reused while the page is unchanged
+        self._thought_cache: Optional[tuple] = None
+    
     async def plan(
         self,
         task: str,
-        observation: Dict[str, Any],
+        observation: Observation,
         memory: Dict[str, Any],
         available_tools: List[Dict[str, Any]]
     ) -> Plan:
         """ReAct-style planning with explicit reasoning steps."""
         
-        # Step 1: Generate thought/reasoning
-        thought = await self._generate_thought(task, observation, memory)
+        # Step 1: Generate thought/reasoning (skip the LLM call if nothing changed)
+        key = self._observation_key(task, observation)
+        recent_actions = memory.get("recent_actions")
+        last_failed = bool(recent_actions) and not recent_actions[-1].get("success", True)
+        # After a failure the cached thought is what led to it - think again
+        if not last_failed and self._thought_cache is not None and self._thought_cache[0] == key:
+            thought = self._thought_cache[1]
+        else:
+            thought = await self._generate_thought(task, observation, memory)
+            self._thought_cache = (key, thought)
         
         # Step 2: Select action based on thought
         action, params = await self._select_action(
@@ -225,18 +332,29 @@ class ReActPlanner(Planner):
             alternatives=[]
         )
     
+    @staticmethod
+    def _observation_key(task: str, observation: Observation) -> int:
+        """Cheap fingerprint of the task and page state."""
+        return hash((
+            task,
+            observation.url,
+            observation.title,
+            observation.visible_text,
+            observation.dom_hash
+        ))
+    
     async def _generate_thought(
         self,
         task: str,
-        observation: Dict[str, Any],
+        observation: Observation,
         memory: Dict[str, Any]
     ) -> str:
         """Generate reasoning about current state."""
         
         prompt = f"""
 Task: {task}
-Current URL: {observation.get('url')}
-Current Page Title: {observation.get('title')}
+Current URL: {observation.url}
+Current Page Title: {observation.title}
 
 Previous actions: {memory.get('recent_actions', [])[-3:]}
 
@@ -264,19 +382,19 @@ Provide your reasoning:
     async def _select_action(
         self,
         thought: str,
-        observation: Dict[str, Any],
+        observation: Observation,
         available_tools: List[Dict[str, Any]]
     ) -> tuple[str, Dict[str, Any]]:
         """Select the best action based on reasoning."""
         
-        elements = observation.get("interactive_elements", [])[:20]
+        elements = observation.interactive_elements[:20]
         
         prompt = f"""
 Based on this reasoning:
 {thought}
 
 And these available elements:
-{json.dumps(elements, indent=2)}
+{_json_dumps(elements, indent=2)}
 
 Select the best action and provide parameters.
 Respond with JSON: {{"action": "action_name", "params": {{...}}}}
@@ -292,5 +410,5 @@ Respond with JSON: {{"action": "action_name", "params": {{...}}}}
             temperature=0.1
         )
         
-        result = json.loads(response.choices[0].message.content)
+        result = _json_loads(response.choices[0].message.content)
         return result.get("action", "wait"), result.get("params", {})
@@ -2,37 +2,263 @@
 Prompt Templates - System prompts and templates for the agent.
 """
 
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from functools import cache, lru_cache
+from pathlib import Path
+from itertools import islice
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Needed by Anthropic SDK versions that predate GA prompt caching
+ANTHROPIC_CACHE_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+
+class PromptCache:
+    """
+    Exact-match, in-process cache of LLM responses.
+    
+    Keys are content hashes of the prompt parts, so only a byte-identical
+    prompt is a hit. Entries expire after ``ttl`` seconds and the least
+    recently used one is dropped once ``maxsize`` is reached.
+    """
+    
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, Tuple[float, Any]] = OrderedDict()
+    
+    @staticmethod
+    def make_key(*parts: str) -> bytes:
+        """Hash each prompt part separately and combine the digests."""
+        return b"".join(
+            hashlib.blake2b(part.encode(), digest_size=16).digest()
+            for part in parts
+        )
+    
+    def get(self, key: bytes) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+    
+    def put(self, key: bytes, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    async def get_or_call(self, key: bytes, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, or await fn() and cache its result.
+        
+        Args:
+            key: Key from make_key()
+            fn: Zero-argument coroutine function producing the value
+        """
+        value = self.get(key)
+        if value is None:
+            value = await fn()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        self._entries.clear()
+
+
+def _usage_field(usage: Any, name: str, default: Any = None) -> Any:
+    """Read a usage field from an SDK object or a plain dict."""
+    if isinstance(usage, dict):
+        return usage.get(name, default)
+    return getattr(usage, name, default)
+
+
+class CacheStats:
+    """
+    Running prompt-cache accounting from provider usage reports.
+    
+    Tells whether the cacheable prefix actually gets cached, and warns
+    when prompts are shorter than the provider will cache at all.
+    """
+    
+    # Shortest prompt each provider caches
+    MIN_CACHEABLE_TOKENS = {"openai": 1024, "anthropic": 1024, "gemini": 2048}
+    
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.cache_write_tokens = 0
+        self._warned: set = set()
+    
+    def record(self, provider: str, usage: Any) -> int:
+        """
+        Record one call's usage.
+        
+        Args:
+            provider: "openai", "anthropic" or "gemini"
+            usage: The response's usage object or dict
+            
+        Returns:
+            Number of prompt tokens served from cache
+        """
+        if usage is None:
+            return 0
+        
+        written = 0
+        if provider == "anthropic":
+            cached = _usage_field(usage, "cache_read_input_tokens") or 0
+            written = _usage_field(usage, "cache_creation_input_tokens") or 0
+            prompt = (_usage_field(usage, "input_tokens") or 0) + cached + written
+        elif provider == "gemini":
+            cached = _usage_field(usage, "cachedContentTokenCount") or 0
+            prompt = _usage_field(usage, "promptTokenCount") or 0
+        else:
+            details = _usage_field(usage, "prompt_tokens_details")
+            cached = (_usage_field(details, "cached_tokens") or 0) if details is not None else 0
+            prompt = _usage_field(usage, "prompt_tokens") or 0
+        
+        self.calls += 1
+        self.hits += cached > 0
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        self.cache_write_tokens += written
+        
+        minimum = self.MIN_CACHEABLE_TOKENS.get(provider)
+        if minimum and prompt < minimum and provider not in self._warned:
+            self._warned.add(provider)
+            logger.warning(
+                f"Prompt is {prompt} tokens, below the {minimum}-token minimum "
+                f"{provider} caches; pad the static prefix to enable caching"
+            )
+        return cached
+    
+    def hit_rate(self) -> float:
+        """Fraction of recorded calls that read anything from cache."""
+        return self.hits / self.calls if self.calls else 0.0
+    
+    def mean_cached_tokens(self) -> float:
+        """Average cached prompt tokens per recorded call."""
+        return self.cached_tokens / self.calls if self.calls else 0.0
+
 
 class SystemPrompts:
     """Collection of system prompts for different agent components."""
     
-    PLANNER_SYSTEM = """Ты автономный AI-агент, управляющий веб-браузером для решения задач пользователя.
+    @staticmethod
+    def cache_breakpoint(text: str) -> Dict[str, Any]:
+        """Wrap text as an Anthropic content block that ends a cacheable prefix."""
+        return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+    
+    @classmethod
+    def as_cached_blocks(cls, name: str, provider: str = "openai") -> Union[str, List[Dict[str, Any]]]:
+        """
+        Get a system prompt in the form the provider caches.
+        
+        OpenAI caches prompt prefixes automatically, so it gets the plain
+        string. Anthropic only caches up to explicit breakpoints, so the
+        prompt comes back as a block list ready for ``system=``.
+        
+        Args:
+            name: Attribute name of the prompt (e.g. "PLANNER_SYSTEM")
+            provider: "openai" or "anthropic"
+        """
+        text = getattr(cls, name)
+        if provider == "anthropic":
+            return [cls.cache_breakpoint(text)]
+        return text
+    
+    # Planner prompt modules. build_planner() orders them so the modules
+    # that never change come first and the tool list (which depends on the
+    # registry) comes last.
+    PLANNER_ROLE = """Ты автономный AI-агент, управляющий веб-браузером для решения задач пользователя."""
 
-Тебе доступны:
+    PLANNER_TOOLS_TEMPLATE = """Тебе доступны:
 - DOM snapshot текущей страницы (список элементов с текстом, aria-label, placeholder, element_id)
 - История действий и наблюдений (memory)
 - Доступные инструменты:
-    1. click(element_id)
-    2. type(element_id, text)
-    3. scroll(direction)
-    4. wait(seconds)
-    5. ask_user(question)
+{tools}"""
 
-Твои правила:
+    PLANNER_RULES = """Твои правила:
 1. Ты не знаешь заранее структуру сайтов.
 2. Не используй захардкоженные шаги.
 3. Не используй заранее известные селекторы или ссылки.
 4. Думай сам, какие элементы на странице важны для задачи.
 5. Если информации недостаточно — задай вопрос пользователю через ask_user.
 6. После каждого действия оцени, продвинулся ли ты к цели.
-7. Если выбранная стратегия не работает — попробуй другую.
+7. Если выбранная стратегия не работает — попробуй другую."""
 
-Формат ответа:
+    PLANNER_OUTPUT_FORMAT = """Формат ответа:
 - Если нужно выполнить действие: {"action": "click", "element_id": "id123"} или {"action": "type", "element_id": "id456", "text": "текст"}  
 - Если нужна дополнительная информация от пользователя: {"action": "ask_user", "question": "Что ввести в поле поиска?"}
 
 Цель: максимально автономно и безопасно решать задачу пользователя, используя браузер и инструменты."""
 
+    PLANNER_DEFAULT_TOOLS = (
+        "click(element_id)",
+        "type(element_id, text)",
+        "scroll(direction)",
+        "wait(seconds)",
+        "ask_user(question)"
+    )
+
+    # The original single-string planner prompt, assembled from its modules
+    PLANNER_SYSTEM = "\n\n".join([
+        PLANNER_ROLE,
+        PLANNER_TOOLS_TEMPLATE.format(tools="\n".join([
+            "    %d. %s" % (i, name) for i, name in enumerate(PLANNER_DEFAULT_TOOLS, 1)
+        ])),
+        PLANNER_RULES,
+        PLANNER_OUTPUT_FORMAT
+    ])
+
+    @staticmethod
+    def _tool_lines(tool_names: Tuple[str, ...]) -> str:
+        return "\n".join(["    %d. %s" % (i, name) for i, name in enumerate(tool_names, 1)])
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _build_planner(cls, tool_names: Tuple[str, ...], provider: str) -> Union[str, List[Dict[str, Any]]]:
+        modules = (
+            cls.PLANNER_ROLE,
+            cls.PLANNER_RULES,
+            cls.PLANNER_OUTPUT_FORMAT,
+            cls.PLANNER_TOOLS_TEMPLATE.format(tools=cls._tool_lines(tool_names))
+        )
+        if provider == "anthropic":
+            return [cls.cache_breakpoint(module) for module in modules]
+        return "\n\n".join(modules)
+
+    @classmethod
+    def build_planner(
+        cls,
+        tool_names: Sequence[str],
+        provider: str = "openai"
+    ) -> Union[str, List[Dict[str, Any]]]:
+        """
+        Assemble the planner system prompt for a given tool list.
+        
+        Role, rules and output format are identical for every tool set, so
+        they lead the prompt and keep a shared cached prefix; only the
+        trailing tool module varies. Anthropic gets one breakpoint per
+        module, OpenAI a single string.
+        
+        Args:
+            tool_names: Tools to list in the prompt
+            provider: "openai" or "anthropic"
+        """
+        return cls._build_planner(tuple(tool_names), provider)
+
     REFLECTION_SYSTEM = """You are a self-reflection module for a browser automation agent. Your role is to analyze recent actions and assess progress.
 
 ## Your Responsibilities
@@ -101,13 +327,54 @@ Given a description of what element to interact with and the available elements
 - Always verify the element matches the intent"""
 
 
+# Invariant scaffolding for the split templates below. Providers only cache
+# exact prefixes, so these come first and per-call values are appended last.
+_TASK_CONTEXT_PREFIX = "## Current Task\n"
+
+_ERROR_CONTEXT_PREFIX = """## Error Occurred
+
+Analyze what went wrong and suggest an alternative approach.
+
+"""
+
+_COMPLETION_CHECK_PREFIX = """## Task Completion Check
+
+Has the task been completed? If yes, what was accomplished?
+If no, what remains to be done?
+
+"""
+
+# Line formats for the per-element/per-action list templates
+_ELEMENT_LINE = "[%d] <%s> %s (id='%s' class='%s')"
+_ACTION_LINE = "%s %s: %s"
+
+
+def _render_el(i: int, el: Dict[str, Any]) -> str:
+    """Render one element_list line."""
+    return _ELEMENT_LINE % (
+        i,
+        el.get('tag', 'unknown'),
+        (el.get('text', '') or '')[:50],
+        el.get('id', ''),
+        (el.get('class', '') or '')[:30]
+    )
+
+
 class PromptTemplates:
-    """Reusable prompt templates."""
+    """
+    Reusable prompt templates.
+    
+    Templates returning a tuple give (static_prefix, dynamic_suffix);
+    use render() or plain concatenation to build the message.
+    """
+    
+    @staticmethod
+    def render(parts: Tuple[str, str]) -> str:
+        return "".join(parts)
     
     @staticmethod
-    def task_context(task: str, url: str, title: str) -> str:
-        return f"""## Current Task
-{task}
+    def task_context(task: str, url: str, title: str) -> Tuple[str, str]:
+        return _TASK_CONTEXT_PREFIX, f"""{task}
 
 ## Current Page
 URL: {url}
@@ -115,148 +382,57 @@ Title: {title}"""
 
     @staticmethod
     def element_list(elements: list, limit: int = 30) -> str:
-        lines = []
-        for i, el in enumerate(elements[:limit]):
-            tag = el.get('tag', 'unknown')
-            text = (el.get('text', '') or '')[:50]
-            el_id = el.get('id', '')
-            el_class = (el.get('class', '') or '')[:30]
-            lines.append(f"[{i}] <{tag}> {text} (id='{el_id}' class='{el_class}')")
-        return "\n".join(lines)
+        if not elements:
+            return ""
+        return "\n".join(_render_el(i, el) for i, el in enumerate(islice(elements, limit)))
 
     @staticmethod
     def action_history(actions: list, limit: int = 5) -> str:
         if not actions:
             return "No previous actions"
         
-        lines = []
-        for action in actions[-limit:]:
-            status = "✓" if action.get('success', True) else "✗"
-            lines.append(f"{status} {action['action']}: {action.get('result', 'done')[:50]}")
-        return "\n".join(lines)
+        return "\n".join([
+            _ACTION_LINE % (
+                "✓" if action.get('success', True) else "✗",
+                action['action'],
+                action.get('result', 'done')[:50]
+            )
+            for action in actions[-limit:]
+        ])
 
     @staticmethod
-    def error_context(error: str, action: str, params: dict) -> str:
-        return f"""## Error Occurred
-
-Action: {action}
+    def error_context(error: str, action: str, params: dict) -> Tuple[str, str]:
+        return _ERROR_CONTEXT_PREFIX, f"""Action: {action}
 Parameters: {params}
-Error: {error}
-
-Please analyze what went wrong and suggest an alternative approach."""
+Error: {error}"""
 
     @staticmethod
-    def completion_check(task: str, current_state: dict) -> str:
-        return f"""## Task Completion Check
-
-Original Task: {task}
+    def completion_check(task: str, current_state: dict) -> Tuple[str, str]:
+        return _COMPLETION_CHECK_PREFIX, f"""Original Task: {task}
 
 Current State:
 - URL: {current_state.get('url', 'unknown')}
 - Title: {current_state.get('title', 'unknown')}
-- Visible Text: {current_state.get('visible_text', '')[:500]}
+- Visible Text: {current_state.get('visible_text', '')[:500]}"""
 
-Has the task been completed? If yes, what was accomplished?
-If no, what remains to be done?"""
-
-
-# Few-shot examples for common scenarios
-FEW_SHOT_EXAMPLES = {
-    "login": """
-Example: Login to a website
-
-Task: "Log into the website with email user@example.com and password secret123"
-
-Step 1:
-Thought: I need to find the login form. Looking for email/username input field.
-Action: type
-Params: {"selector": "input[type='email']", "text": "user@example.com"}
-
-Step 2:
-Thought: Email entered. Now I need to enter the password.
-Action: type
-Params: {"selector": "input[type='password']", "text": "secret123"}
-
-Step 3:
-Thought: Credentials entered. Now click the login/submit button.
-Action: click
-Params: {"selector": "button[type='submit']", "text": "Log in"}
-
-Step 4:
-Thought: Clicked login. Need to wait for navigation and verify login success.
-Action: wait
-Params: {"duration": 2}
-
-Step 5:
-Thought: Page loaded. I can see the dashboard/account page. Login successful.
-Action: complete
-Params: {"reason": "Successfully logged in - dashboard is now visible"}
-""",
-
-    "search": """
-Example: Search for a product
-
-Task: "Search for 'wireless headphones' on this e-commerce site"
-
-Step 1:
-Thought: Need to find the search input. Looking for search bar or search icon.
-Action: click
-Params: {"selector": "input[type='search']", "fallback": ".search-input"}
-
-Step 2:
-Thought: Search input is focused. Now type the search query.
-Action: type
-Params: {"selector": "input[type='search']", "text": "wireless headphones"}
-
-Step 3:
-Thought: Query entered. Need to submit the search - press Enter or click search button.
-Action: click
-Params: {"selector": "button.search-button", "fallback": "press:Enter"}
-
-Step 4:
-Thought: Search results loading. Wait for results to appear.
-Action: wait
-Params: {"selector": ".search-results", "timeout": 5}
-
-Step 5:
-Thought: Search results are displayed showing wireless headphones products.
-Action: complete
-Params: {"reason": "Search completed - results for 'wireless headphones' are displayed"}
-""",
-
-    "form_fill": """
-Example: Fill out a contact form
-
-Task: "Fill out the contact form with name 'John Doe', email 'john@example.com', and message 'Hello!'"
-
-Step 1:
-Thought: Need to find the name input field first.
-Action: type
-Params: {"selector": "input[name='name']", "text": "John Doe"}
-
-Step 2:
-Thought: Name entered. Now find and fill the email field.
-Action: type
-Params: {"selector": "input[name='email']", "text": "john@example.com"}
-
-Step 3:
-Thought: Email entered. Now find the message textarea.
-Action: type
-Params: {"selector": "textarea[name='message']", "text": "Hello!"}
-
-Step 4:
-Thought: All fields filled. Now submit the form.
-Action: click
-Params: {"selector": "button[type='submit']", "text": "Send"}
-
-Step 5:
-Thought: Form submitted. Looking for confirmation message.
-Action: wait
-Params: {"selector": ".success-message", "timeout": 3}
-
-Step 6:
-Thought: Success message displayed - form was submitted successfully.
-Action: complete
-Params: {"reason": "Contact form submitted successfully"}
-"""
-}
+
+# Few-shot examples for common scenarios, one text file per scenario
+_FEW_SHOT_DIR = Path(__file__).parent / "few_shot"
+_FEW_SHOT_NAMES = ("login", "search", "form_fill")
+
+
+@cache
+def get_few_shot(name: str) -> str:
+    """
+    Load a few-shot example by scenario name (e.g. "login", "search").
+    
+    Read from agent/few_shot/ on first use and cached afterwards.
+    """
+    return (_FEW_SHOT_DIR / f"{name}.txt").read_text(encoding="utf-8")
+
+
+def __getattr__(name: str):
+    # FEW_SHOT_EXAMPLES is built on first access instead of at import
+    if name == "FEW_SHOT_EXAMPLES":
+        return {scenario: get_few_shot(scenario) for scenario in _FEW_SHOT_NAMES}
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
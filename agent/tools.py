@@ -2,13 +2,23 @@
 Tool Schema - Function calling definitions for the LLM.
 """
 
+import json
+import sys
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+# Property schemas shared by several tools. The same dict object is reused
+# rather than rebuilt per tool; treat them as read-only.
+_SELECTOR_PROP = {"type": "string", "description": "CSS selector for the element"}
+_TEXT_PROP = {"type": "string", "description": "Text content of the element"}
+_INPUT_SELECTOR_PROP = {"type": "string", "description": "CSS selector for the input field"}
+_ELEMENT_TEXT_PROP = {"type": "string", "description": "Placeholder or label text of the input field"}
+
+
+@dataclass(slots=True, frozen=True)
 class ActionResult:
-    """Result of an action execution."""
+    """Result of an action execution (immutable, so instances can be shared)."""
     success: bool
     message: str
     data: Optional[Any] = None
@@ -22,7 +32,14 @@ class ToolRegistry:
     """
     
     def __init__(self):
-        self._tools: Dict[str, Dict[str, Any]] = {}
+        # Struct-of-arrays: tool i is (_names[i], _descs[i], _params[i])
+        self._names: List[str] = []
+        self._descs: List[str] = []
+        self._params: List[Dict[str, Any]] = []
+        self._idx: Dict[str, int] = {}
+        self._schema_cache: Optional[List[Dict[str, Any]]] = None
+        self._openai_format_cache: Optional[List[Dict[str, Any]]] = None
+        self._openai_json_bytes: Optional[bytes] = None
         self._register_default_tools()
         
     def _register_default_tools(self):
@@ -91,14 +108,8 @@ class ToolRegistry:
             parameters={
                 "type": "object",
                 "properties": {
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for the element"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "Text content of the element"
-                    }
+                    "selector": _SELECTOR_PROP,
+                    "text": _TEXT_PROP
                 }
             }
         )
@@ -106,7 +117,7 @@ class ToolRegistry:
         # Type tools
         self.register(
             name="type",
-            description="Type text into an input field. Simulates real typing with keystrokes.",
+            description="Type text into an input field. Simulates real keystrokes on fields that react to them (e.g. autocomplete).",
             parameters={
                 "type": "object",
                 "properties": {
@@ -114,14 +125,8 @@ class ToolRegistry:
                         "type": "string",
                         "description": "The text to type"
                     },
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for the input field"
-                    },
-                    "element_text": {
-                        "type": "string",
-                        "description": "Placeholder or label text of the input field"
-                    },
+                    "selector": _INPUT_SELECTOR_PROP,
+                    "element_text": _ELEMENT_TEXT_PROP,
                     "clear_first": {
                         "type": "boolean",
                         "description": "Whether to clear existing content before typing (default: true)"
@@ -145,14 +150,8 @@ class ToolRegistry:
                         "type": "string",
                         "description": "The text to fill"
                     },
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for the input field"
-                    },
-                    "element_text": {
-                        "type": "string",
-                        "description": "Placeholder or label text of the input field"
-                    }
+                    "selector": _INPUT_SELECTOR_PROP,
+                    "element_text": _ELEMENT_TEXT_PROP
                 },
                 "required": ["text"]
             }
@@ -205,14 +204,8 @@ class ToolRegistry:
             parameters={
                 "type": "object",
                 "properties": {
-                    "selector": {
-                        "type": "string",
-                        "description": "CSS selector for the element"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "Text content of the element"
-                    }
+                    "selector": _SELECTOR_PROP,
+                    "text": _TEXT_PROP
                 }
             }
         )
@@ -320,33 +313,71 @@ class ToolRegistry:
         parameters: Dict[str, Any]
     ):
         """Register a new tool."""
-        self._tools[name] = {
-            "name": name,
-            "description": description,
-            "parameters": parameters
-        }
+        name = sys.intern(name)
+        i = self._idx.get(name)
+        if i is None:
+            self._idx[name] = len(self._names)
+            self._names.append(name)
+            self._descs.append(description)
+            self._params.append(parameters)
+        else:
+            # Re-registering replaces the tool in place, keeping its position
+            self._descs[i] = description
+            self._params[i] = parameters
+        self._schema_cache = None
+        self._openai_format_cache = None
+        self._openai_json_bytes = None
         
     def get_schema(self) -> List[Dict[str, Any]]:
         """Get all tools in OpenAI function calling format."""
-        return list(self._tools.values())
+        # Cached so every step hands the planner the same list object
+        if self._schema_cache is None:
+            self._schema_cache = [
+                {"name": name, "description": desc, "parameters": params}
+                for name, desc, params in zip(self._names, self._descs, self._params)
+            ]
+        return self._schema_cache
     
     def get_tool(self, name: str) -> Optional[Dict[str, Any]]:
         """Get a specific tool's schema."""
-        return self._tools.get(name)
+        i = self._idx.get(name)
+        if i is None:
+            return None
+        return {
+            "name": self._names[i],
+            "description": self._descs[i],
+            "parameters": self._params[i]
+        }
     
     def list_tools(self) -> List[str]:
         """List all registered tool names."""
-        return list(self._tools.keys())
+        return list(self._names)
     
     def to_openai_format(self) -> List[Dict[str, Any]]:
         """Convert to OpenAI tools format for API calls."""
-        return [
-            {
-                "type": "function",
-                "function": tool
-            }
-            for tool in self._tools.values()
-        ]
+        if self._openai_format_cache is None:
+            self._openai_format_cache = [
+                {
+                    "type": "function",
+                    "function": tool
+                }
+                for tool in self.get_schema()
+            ]
+        return self._openai_format_cache
+    
+    def to_openai_json_bytes(self) -> bytes:
+        """
+        OpenAI tools payload pre-serialized as compact JSON.
+        
+        For HTTP layers that accept a raw body; built once and rebuilt
+        only after register() changes the registry.
+        """
+        if self._openai_json_bytes is None:
+            self._openai_json_bytes = json.dumps(
+                self.to_openai_format(),
+                separators=(",", ":")
+            ).encode()
+        return self._openai_json_bytes
 
 
 # Pre-defined tool sets for different use cases
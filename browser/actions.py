@@ -4,13 +4,95 @@ Browser Actions - Click, type, scroll, and other browser interactions.
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any, Union
-from playwright.async_api import Page, ElementHandle, TimeoutError as PlaywrightTimeout
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union
+from playwright.async_api import (
+    Page, ElementHandle, Keyboard, Mouse,
+    Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+)
 
 from agent.tools import ActionResult
 
 logger = logging.getLogger(__name__)
 
+# URLs with any of these prefixes are navigated as-is; anything else gets https://
+_URL_SCHEMES = ('http://', 'https://', 'file://', 'data:', 'about:', 'chrome://')
+
+# Unit (dx, dy) per scroll direction
+_SCROLL_VECTORS = {'down': (0, 1), 'up': (0, -1), 'right': (1, 0), 'left': (-1, 0)}
+
+# True once the window has scrolled to [x, y], clamped to the scrollable range
+_SCROLL_DONE_JS = '''
+    ([x, y]) => {
+        const root = document.scrollingElement || document.documentElement;
+        const maxX = Math.max(0, root.scrollWidth - root.clientWidth);
+        const maxY = Math.max(0, root.scrollHeight - root.clientHeight);
+        const tx = Math.min(Math.max(x, 0), maxX);
+        const ty = Math.min(Math.max(y, 0), maxY);
+        return Math.abs(window.scrollX - tx) < 2 && Math.abs(window.scrollY - ty) < 2;
+    }
+'''
+
+# True for fields likely to react to individual keystrokes (suggestions,
+# key handlers), which type() should not fill in one go
+_NEEDS_KEYSTROKES_JS = '''
+    el => !!(
+        el.onkeydown || el.onkeypress || el.onkeyup
+        || el.hasAttribute('list')
+        || el.type === 'search'
+        || (el.getAttribute('aria-autocomplete') || 'none') !== 'none'
+        || ['combobox', 'searchbox'].includes(el.getAttribute('role'))
+    )
+'''
+
+# Leading characters that make Playwright parse text= as a quoted string
+_QUOTE_CHARS = ("'", '"', "`")
+
+# Escapes text for a quoted CSS/Playwright selector string (either quote style)
+_CSS_STRING_ESC = str.maketrans({"\\": "\\\\", "'": "\\'", '"': '\\"', "\n": "\\a "})
+
+# Resolves once `text` shows up on the page. The rendered text is re-checked
+# only when the page mutates (at most every 16ms), so idle pages aren't
+# re-scanned on a timer; a final check runs at the timeout.
+_WAIT_FOR_TEXT_JS = '''
+    ([text, timeout]) => new Promise((resolve) => {
+        if (document.body.innerText.includes(text)) return resolve(true);
+        
+        // innerText also sees text revealed by class/style changes or split
+        // across nodes, and skips hidden and script text
+        let scheduled = false;
+        const check = () => {
+            scheduled = false;
+            if (document.body.innerText.includes(text)) {
+                clearTimeout(timer);
+                observer.disconnect();
+                resolve(true);
+            }
+        };
+        const observer = new MutationObserver(() => {
+            if (!scheduled) {
+                scheduled = true;
+                // Not requestAnimationFrame - it never fires in background tabs
+                setTimeout(check, 16);
+            }
+        });
+        const timer = setTimeout(() => {
+            observer.disconnect();
+            resolve(document.body.innerText.includes(text));
+        }, timeout);
+        
+        observer.observe(document.body, {
+            subtree: true, childList: true, characterData: true, attributes: true
+        });
+    })
+'''
+
+
+@lru_cache(maxsize=64)
+def _fail(message: str) -> ActionResult:
+    """Shared failure result for a fixed message (results are never mutated)."""
+    return ActionResult(success=False, message=message, data=None)
+
 
 class BrowserActions:
     """
@@ -19,35 +101,91 @@ class BrowserActions:
     Each method returns an ActionResult indicating success/failure.
     """
     
+    # Elements addressable by index
+    INTERACTIVE_SELECTOR = 'a, button, input, select, textarea, [role="button"], [role="link"], [tabindex]'
+    
     def __init__(self, browser_controller):
         self.browser = browser_controller
+        # query_selector_all results: selector -> (dom generation, handles).
+        # The generation is bumped on navigation, after waits and after every
+        # DOM-changing action, whether or not it succeeded.
+        self._sel_cache: Dict[str, Tuple[int, List[ElementHandle]]] = {}
+        self._dom_gen = 0
+        self._bound_page: Optional[Page] = None
+        self._keyboard: Optional[Keyboard] = None
+        self._mouse: Optional[Mouse] = None
         
     @property
     def page(self) -> Page:
-        return self.browser.page
+        page = self.browser.page
+        if page is not self._bound_page:
+            # The controller may start or swap its page after we were built
+            self._bind_page(page)
+        return page
+    
+    @property
+    def keyboard(self) -> Keyboard:
+        if self.browser.page is not self._bound_page:
+            self._bind_page(self.browser.page)
+        return self._keyboard
+    
+    @property
+    def mouse(self) -> Mouse:
+        if self.browser.page is not self._bound_page:
+            self._bind_page(self.browser.page)
+        return self._mouse
+    
+    def _bind_page(self, page: Optional[Page]):
+        """Hook cache invalidation into a (new) page and cache its input devices."""
+        self._bound_page = page
+        self._keyboard = page.keyboard if page is not None else None
+        self._mouse = page.mouse if page is not None else None
+        self.invalidate()
+        if page is not None:
+            page.on("framenavigated", lambda _frame: self.invalidate())
+    
+    def invalidate(self, selector: str = None):
+        """
+        Drop cached element queries.
+        
+        Args:
+            selector: Only forget this selector (default: everything)
+        """
+        if selector is None:
+            self._dom_gen += 1
+            self._sel_cache.clear()
+        else:
+            self._sel_cache.pop(selector, None)
     
     # ==================== Navigation Actions ====================
     
-    async def navigate(self, url: str, wait_until: str = "domcontentloaded") -> ActionResult:
+    async def navigate(
+        self,
+        url: str,
+        wait_until: str = "domcontentloaded",
+        settle: bool = False
+    ) -> ActionResult:
         """
         Navigate to a URL.
         
         Args:
             url: URL to navigate to
             wait_until: When to consider navigation complete
+            settle: Also wait for the network to go idle before returning
         """
         try:
             # Add protocol if missing
-            if not url.startswith(('http://', 'https://')):
+            if not url.startswith(_URL_SCHEMES):
                 url = 'https://' + url
                 
             await self.page.goto(url, wait_until=wait_until, timeout=30000)
-            await asyncio.sleep(1)  # Extra wait for dynamic content
+            if settle:
+                await self._wait_for_network_idle()
             
             return ActionResult(
                 success=True,
                 message=f"Navigated to {url}",
-                data={"url": self.page.url}
+                data={"url": self.page.url, "needs_settle": True}
             )
         except PlaywrightTimeout:
             return ActionResult(
@@ -69,7 +207,7 @@ class BrowserActions:
             return ActionResult(
                 success=True,
                 message="Navigated back",
-                data={"url": self.page.url}
+                data={"url": self.page.url, "needs_settle": True}
             )
         except Exception as e:
             return ActionResult(
@@ -85,7 +223,7 @@ class BrowserActions:
             return ActionResult(
                 success=True,
                 message="Navigated forward",
-                data={"url": self.page.url}
+                data={"url": self.page.url, "needs_settle": True}
             )
         except Exception as e:
             return ActionResult(
@@ -101,7 +239,7 @@ class BrowserActions:
             return ActionResult(
                 success=True,
                 message="Page refreshed",
-                data={"url": self.page.url}
+                data={"url": self.page.url, "needs_settle": True}
             )
         except Exception as e:
             return ActionResult(
@@ -120,7 +258,8 @@ class BrowserActions:
         position: Dict[str, int] = None,
         button: str = "left",
         click_count: int = 1,
-        timeout: int = 10000
+        timeout: int = 10000,
+        settle: bool = False
     ) -> ActionResult:
         """
         Click on an element.
@@ -133,33 +272,30 @@ class BrowserActions:
             button: Mouse button ('left', 'right', 'middle')
             click_count: Number of clicks (1 for single, 2 for double)
             timeout: Maximum time to wait for element
+            settle: Wait for the network to go idle after clicking
         """
         try:
             element = await self._find_element(selector, text, index, timeout)
             
             if element:
-                await element.scroll_into_view_if_needed()
+                # click() scrolls the element into view as part of its actionability checks
                 await element.click(button=button, click_count=click_count, timeout=timeout)
-                await asyncio.sleep(0.5)  # Wait for potential navigation/changes
+                navigated = await self._await_effects(0.05, settle)
                 
                 return ActionResult(
                     success=True,
                     message=f"Clicked element",
-                    data={"selector": selector, "text": text}
+                    data={"selector": selector, "text": text, "needs_settle": navigated}
                 )
             elif position:
-                await self.page.mouse.click(position['x'], position['y'], button=button)
+                await self.mouse.click(position['x'], position['y'], button=button)
                 return ActionResult(
                     success=True,
                     message=f"Clicked at position ({position['x']}, {position['y']})",
                     data=position
                 )
             else:
-                return ActionResult(
-                    success=False,
-                    message="Element not found",
-                    data=None
-                )
+                return _fail("Element not found")
         except PlaywrightTimeout:
             return ActionResult(
                 success=False,
@@ -172,6 +308,8 @@ class BrowserActions:
                 message=f"Click failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()
     
     async def hover(
         self,
@@ -192,17 +330,15 @@ class BrowserActions:
                     data={"selector": selector}
                 )
             else:
-                return ActionResult(
-                    success=False,
-                    message="Element not found for hover",
-                    data=None
-                )
+                return _fail("Element not found for hover")
         except Exception as e:
             return ActionResult(
                 success=False,
                 message=f"Hover failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()
     
     # ==================== Type Actions ====================
     
@@ -214,8 +350,9 @@ class BrowserActions:
         index: int = None,
         clear_first: bool = True,
         press_enter: bool = False,
-        delay: int = 50,
-        timeout: int = 10000
+        delay: Optional[int] = None,
+        timeout: int = 10000,
+        settle: bool = False
     ) -> ActionResult:
         """
         Type text into an input field.
@@ -227,8 +364,12 @@ class BrowserActions:
             index: Element index from DOM snapshot
             clear_first: Whether to clear existing content first
             press_enter: Whether to press Enter after typing
-            delay: Delay between keystrokes in ms
+            delay: Delay between keystrokes in ms (<= 0 fills instantly when
+                   clear_first is set). By default, fields that react to
+                   keystrokes (autocomplete, key handlers) are typed at 50ms
+                   and the rest are filled instantly.
             timeout: Maximum time to wait for element
+            settle: Wait for the network to go idle after pressing Enter
         """
         try:
             element = await self._find_element(selector, element_text, index, timeout)
@@ -236,32 +377,38 @@ class BrowserActions:
             if element:
                 await element.scroll_into_view_if_needed()
                 
-                if clear_first:
-                    await element.fill("")
-                    
-                await element.type(text, delay=delay)
+                if delay is None:
+                    delay = 50 if await element.evaluate(_NEEDS_KEYSTROKES_JS) else 0
+                
+                if delay <= 0 and clear_first:
+                    # No keystroke pacing wanted - set the value in one call
+                    await element.fill(text)
+                else:
+                    if clear_first:
+                        await element.fill("")
+                        
+                    await element.type(text, delay=delay)
                 
+                navigated = False
                 if press_enter:
                     await element.press("Enter")
-                    await asyncio.sleep(0.5)
+                    navigated = await self._await_effects(0.05, settle)
                 
                 return ActionResult(
                     success=True,
                     message=f"Typed '{text[:50]}...' into field",
-                    data={"text_length": len(text)}
+                    data={"text_length": len(text), "needs_settle": navigated}
                 )
             else:
-                return ActionResult(
-                    success=False,
-                    message="Input field not found",
-                    data=None
-                )
+                return _fail("Input field not found")
         except Exception as e:
             return ActionResult(
                 success=False,
                 message=f"Type failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()
     
     async def fill(
         self,
@@ -285,17 +432,15 @@ class BrowserActions:
                     data={"text": text[:100]}
                 )
             else:
-                return ActionResult(
-                    success=False,
-                    message="Input field not found",
-                    data=None
-                )
+                return _fail("Input field not found")
         except Exception as e:
             return ActionResult(
                 success=False,
                 message=f"Fill failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()
     
     async def press_key(self, key: str, modifiers: list = None) -> ActionResult:
         """
@@ -311,7 +456,7 @@ class BrowserActions:
             else:
                 key_combo = key
                 
-            await self.page.keyboard.press(key_combo)
+            await self.keyboard.press(key_combo)
             
             return ActionResult(
                 success=True,
@@ -324,6 +469,8 @@ class BrowserActions:
                 message=f"Key press failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()
     
     # ==================== Scroll Actions ====================
     
@@ -331,7 +478,8 @@ class BrowserActions:
         self,
         direction: str = "down",
         amount: int = 500,
-        selector: str = None
+        selector: str = None,
+        settle: bool = False
     ) -> ActionResult:
         """
         Scroll the page or an element.
@@ -340,31 +488,39 @@ class BrowserActions:
             direction: 'up', 'down', 'left', 'right'
             amount: Pixels to scroll
             selector: Optional selector to scroll within element
+            settle: Wait for the network to go idle (e.g. infinite-scroll loads)
         """
         try:
+            dx, dy = _SCROLL_VECTORS.get(direction, _SCROLL_VECTORS['down'])
+            dx, dy = dx * amount, dy * amount
+            
             if selector:
+                # Element scrolls are synchronous in JS - nothing to wait for
                 element = await self.page.query_selector(selector)
                 if element:
-                    scroll_js = {
-                        'down': f"el.scrollTop += {amount}",
-                        'up': f"el.scrollTop -= {amount}",
-                        'right': f"el.scrollLeft += {amount}",
-                        'left': f"el.scrollLeft -= {amount}"
-                    }
-                    await self.page.evaluate(
-                        f"(el) => {{ {scroll_js.get(direction, scroll_js['down'])} }}",
-                        element
-                    )
+                    await element.evaluate("(el, [dx, dy]) => el.scrollBy(dx, dy)", [dx, dy])
             else:
-                scroll_js = {
-                    'down': f"window.scrollBy(0, {amount})",
-                    'up': f"window.scrollBy(0, -{amount})",
-                    'right': f"window.scrollBy({amount}, 0)",
-                    'left': f"window.scrollBy(-{amount}, 0)"
-                }
-                await self.page.evaluate(scroll_js.get(direction, scroll_js['down']))
+                start = await self.page.evaluate(
+                    "[window.scrollX, window.scrollY, window.innerWidth, window.innerHeight]"
+                )
+                # The wheel scrolls whatever is under the pointer, which may still
+                # be over a panel from the last click - aim at the viewport centre
+                await self.mouse.move(start[2] / 2, start[3] / 2)
+                await self.mouse.wheel(dx, dy)
+                try:
+                    # Wheel scrolling is async (and may be smooth); wait until the
+                    # viewport reaches the target or as far as the page allows
+                    await self.page.wait_for_function(
+                        _SCROLL_DONE_JS,
+                        arg=[start[0] + dx, start[1] + dy],
+                        timeout=500,
+                        polling=16
+                    )
+                except PlaywrightTimeout:
+                    pass
             
-            await asyncio.sleep(0.3)  # Wait for scroll animation
+            if settle:
+                await self._wait_for_network_idle()
             
             return ActionResult(
                 success=True,
@@ -377,6 +533,8 @@ class BrowserActions:
                 message=f"Scroll failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()  # Lazy-loaded content may have appeared
     
     async def scroll_to_element(
         self,
@@ -396,17 +554,15 @@ class BrowserActions:
                     data={"selector": selector}
                 )
             else:
-                return ActionResult(
-                    success=False,
-                    message="Element not found to scroll to",
-                    data=None
-                )
+                return _fail("Element not found to scroll to")
         except Exception as e:
             return ActionResult(
                 success=False,
                 message=f"Scroll to element failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()  # Lazy-loaded content may have shifted indices
     
     # ==================== Wait Actions ====================
     
@@ -422,7 +578,8 @@ class BrowserActions:
         Wait for time or element.
         
         Args:
-            duration: Seconds to wait (if no selector)
+            duration: Seconds to wait (if no selector); with nothing given,
+                      waits up to 1 second for network idle
             selector: CSS selector to wait for
             text: Text to wait to appear
             state: Element state to wait for ('visible', 'hidden', 'attached', 'detached')
@@ -437,10 +594,17 @@ class BrowserActions:
                     data={"selector": selector, "state": state}
                 )
             elif text:
-                await self.page.wait_for_function(
-                    f"document.body.innerText.includes('{text}')",
-                    timeout=timeout
-                )
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                try:
+                    found = await self.page.evaluate(_WAIT_FOR_TEXT_JS, [text, timeout])
+                except PlaywrightError:
+                    # Observer couldn't run to completion (e.g. the page navigated
+                    # mid-wait) - poll for the rest of the timeout instead
+                    remaining = timeout - (loop.time() - started) * 1000
+                    found = await self._poll_for_text(text, remaining)
+                if not found:
+                    return _fail("Wait timeout exceeded")
                 return ActionResult(
                     success=True,
                     message=f"Text '{text[:50]}' appeared",
@@ -454,24 +618,26 @@ class BrowserActions:
                     data={"duration": duration}
                 )
             else:
-                await asyncio.sleep(1)
+                # Return as soon as the page is idle, waiting at most 1 second
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                await self._wait_for_network_idle(timeout=1000)
+                waited = round(loop.time() - started, 2)
                 return ActionResult(
                     success=True,
-                    message="Waited 1 second",
-                    data={"duration": 1}
+                    message=f"Waited {waited} seconds for the page to settle",
+                    data={"duration": waited}
                 )
         except PlaywrightTimeout:
-            return ActionResult(
-                success=False,
-                message="Wait timeout exceeded",
-                data=None
-            )
+            return _fail("Wait timeout exceeded")
         except Exception as e:
             return ActionResult(
                 success=False,
                 message=f"Wait failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()  # Waiting is for the page to change
     
     # ==================== Extract Actions ====================
     
@@ -491,11 +657,12 @@ class BrowserActions:
         """
         try:
             if all_matches:
-                elements = await self.page.query_selector_all(selector)
-                if attribute:
-                    values = [await el.get_attribute(attribute) for el in elements]
-                else:
-                    values = [await el.inner_text() for el in elements]
+                # Read every match in one round trip instead of one per element
+                values = await self.page.eval_on_selector_all(
+                    selector,
+                    "(els, attr) => els.map(el => attr ? el.getAttribute(attr) : el.innerText)",
+                    attribute
+                )
                 
                 return ActionResult(
                     success=True,
@@ -516,11 +683,7 @@ class BrowserActions:
                         data={"value": value}
                     )
                 else:
-                    return ActionResult(
-                        success=False,
-                        message="Element not found for extraction",
-                        data=None
-                    )
+                    return _fail("Element not found for extraction")
         except Exception as e:
             return ActionResult(
                 success=False,
@@ -550,11 +713,7 @@ class BrowserActions:
             element = await self.page.query_selector(selector)
             
             if not element:
-                return ActionResult(
-                    success=False,
-                    message="Select element not found",
-                    data=None
-                )
+                return _fail("Select element not found")
             
             if value:
                 await element.select_option(value=value)
@@ -574,9 +733,71 @@ class BrowserActions:
                 message=f"Select failed: {str(e)}",
                 data=None
             )
+        finally:
+            self.invalidate()
     
     # ==================== Helper Methods ====================
     
+    async def _query_all_cached(self, selector: str) -> List[ElementHandle]:
+        """query_selector_all, reused until the DOM generation changes."""
+        page = self.page
+        cached = self._sel_cache.get(selector)
+        if cached is not None and cached[0] == self._dom_gen:
+            return cached[1]
+        elements = await page.query_selector_all(selector)
+        self._sel_cache[selector] = (self._dom_gen, elements)
+        return elements
+    
+    async def _poll_for_text(self, text: str, timeout: float) -> bool:
+        """
+        Poll the page text with exponential back-off (50ms doubling to 1s).
+        
+        Args:
+            text: Text to look for
+            timeout: Maximum wait time in ms
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout / 1000
+        interval = 0.05
+        while True:
+            try:
+                body_text = await self.page.evaluate("document.body ? document.body.innerText : ''")
+                if text in body_text:
+                    return True
+            except PlaywrightError:
+                pass  # Between documents - check again on the next tick
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, 1.0)
+    
+    async def _await_effects(self, ceiling: float, settle: bool = False) -> bool:
+        """
+        Give an action's side effects a brief chance to start.
+        
+        Waits at most ``ceiling`` seconds for a navigation instead of
+        sleeping a fixed delay, or for network idle when ``settle`` is set.
+        
+        Returns:
+            True if the page navigated (the caller should let it settle)
+        """
+        if settle:
+            await self._wait_for_network_idle()
+            return False
+        try:
+            await self.page.wait_for_event("framenavigated", timeout=ceiling * 1000)
+            return True
+        except PlaywrightTimeout:
+            return False
+    
+    async def _wait_for_network_idle(self, timeout: int = 5000):
+        """Wait for network idle, giving up quietly on pages that never go idle."""
+        try:
+            await self.page.wait_for_load_state("networkidle", timeout=timeout)
+        except PlaywrightTimeout:
+            pass
+    
     async def _find_element(
         self,
         selector: str = None,
@@ -591,39 +812,73 @@ class BrowserActions:
         """
         if selector:
             try:
-                await self.page.wait_for_selector(selector, timeout=timeout)
-                return await self.page.query_selector(selector)
+                # The wait already yields the handle; visibility is left to the
+                # action itself (click/fill/hover run their own actionability checks)
+                element = await self.page.wait_for_selector(selector, timeout=timeout, state="attached")
+                if element:
+                    return element
             except:
                 pass
         
         if text:
-            # Try various text-based selectors
-            text_selectors = [
-                f"text={text}",
-                f"button:has-text('{text}')",
-                f"a:has-text('{text}')",
-                f"[aria-label='{text}']",
-                f"[placeholder='{text}']",
-                f"label:has-text('{text}')"
-            ]
-            
-            for sel in text_selectors:
-                try:
-                    element = await self.page.query_selector(sel)
-                    if element:
-                        return element
-                except:
-                    continue
+            # One round trip for all the text variants; the engine returns
+            # the first match in document order
+            quoted = '"%s"' % text.translate(_CSS_STRING_ESC)
+            combined = (
+                f":text({quoted}), button:has-text({quoted}), a:has-text({quoted}), "
+                f"[aria-label={quoted}], [placeholder={quoted}], label:has-text({quoted})"
+            )
+            try:
+                element = await self.page.query_selector(combined)
+            except Exception:
+                element = await self._query_text_variants(text)
+            if element:
+                return element
         
         if index is not None:
             # Find by DOM snapshot index - requires interactive elements list
-            interactive_selector = 'a, button, input, select, textarea, [role="button"], [role="link"], [tabindex]'
-            elements = await self.page.query_selector_all(interactive_selector)
+            elements = await self._query_all_cached(self.INTERACTIVE_SELECTOR)
             if 0 <= index < len(elements):
                 return elements[index]
+            # Don't let a retry after the page grows read the same short list
+            self.invalidate(self.INTERACTIVE_SELECTOR)
         
         return None
     
+    async def _query_text_variants(self, text: str) -> Optional[ElementHandle]:
+        """
+        Query every text-based selector at once (fallback for the combined query).
+        
+        Returns the match of the highest-priority selector that found one.
+        """
+        escaped = text.translate(_CSS_STRING_ESC)
+        # Bare text= reads a leading quote as the start of a quoted string, so
+        # such text would always fail; use the quoted pseudo-class form instead
+        if text.startswith(_QUOTE_CHARS):
+            text_query = f':text("{escaped}")'
+        else:
+            text_query = f"text={text}"
+        text_selectors = [
+            text_query,
+            f"button:has-text('{escaped}')",
+            f"a:has-text('{escaped}')",
+            f"[aria-label='{escaped}']",
+            f"[placeholder='{escaped}']",
+            f"label:has-text('{escaped}')"
+        ]
+        
+        page = self.page
+        results = await asyncio.gather(
+            *(page.query_selector(sel) for sel in text_selectors),
+            return_exceptions=True
+        )
+        # Queries run concurrently, but the winner is picked in priority order.
+        # Exceptions are selectors that are invalid for this text - skip them
+        for element in results:
+            if element and not isinstance(element, BaseException):
+                return element
+        return None
+    
     async def complete(self, reason: str = "Task completed") -> ActionResult:
         """
         Mark the task as complete.
@@ -2,21 +2,118 @@
 DOM Snapshot - Capture and process DOM state for LLM consumption.
 """
 
+import asyncio
+import hashlib
+import heapq
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import sys
+from typing import Dict, Any, List, Optional, Sequence
 from dataclasses import dataclass, field
 from playwright.async_api import Page
 
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Capture script keys that differ from the ElementInfo field names
+_JS_FIELD_NAMES = {
+    "ariaLabel": "aria_label",
+    "isVisible": "is_visible",
+    "isEnabled": "is_enabled",
+    "isInteractive": "is_interactive",
+    "boundingBox": "bounding_box",
+}
+
+# Tags the summary and buckets look up - one shared string object each, so
+# dict lookups against the literals hit on identity
+_INTERNED_TAGS = {
+    tag: sys.intern(tag)
+    for tag in ('a', 'button', 'input', 'select', 'textarea', 'div', 'span')
+}
+
+
+# One node of a Playwright aria snapshot: `- role "name" [attr=x]: text`
+_AX_LINE = re.compile(
+    r'\s*- (?P<role>[\w-]+)(?: "(?P<name>(?:[^"\\]|\\.)*)")?(?P<attrs>(?: \[[^\]]*\])*)(?:: (?P<text>.*))?:?$'
+)
+_AX_ATTR = re.compile(r'\[([\w-]+)(?:=([^\]]*))?\]')
+
+# Element tags the summary and actions expect for the common roles
+_AX_ROLE_TAGS = {
+    "link": "a",
+    "button": "button",
+    "textbox": "input",
+    "searchbox": "input",
+    "checkbox": "input",
+    "radio": "input",
+    "combobox": "select",
+    "listbox": "select",
+}
+
+
+def _ax_unquote(value: str) -> str:
+    """Strip YAML quoting from an aria snapshot key or value."""
+    if value.startswith('"'):
+        return json.loads(value)
+    if value.startswith("'") and value.endswith("'"):
+        return value[1:-1].replace("''", "'")
+    return value
+
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+# Installed once per document (see BrowserController.start): counts DOM
+# mutations and other visible changes so capture can tell when nothing changed
+# since the last snapshot, and stamps the latest mutation so the controller can
+# wait for a quiet page
+DOM_TICK_SCRIPT = '''
+    (() => {
+        if (window.__domTick !== undefined) return;
+        window.__domTick = 0;
+        window.__lastMutation = performance.now();
+        new MutationObserver(() => {
+            window.__domTick++;
+            window.__lastMutation = performance.now();
+        }).observe(document, {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            characterData: true
+        });
+        // Changes that don't mutate the DOM: typed/selected values, inner
+        // scrolling, :hover/:focus styles and late image/font layout shifts.
+        // Capture phase, since scroll, focus and load don't bubble.
+        const bump = () => { window.__domTick++; };
+        for (const type of ['input', 'change', 'scroll', 'focusin', 'focusout',
+                            'pointerover', 'pointerout', 'load']) {
+            document.addEventListener(type, bump, true);
+        }
+        if (document.fonts) document.fonts.addEventListener('loadingdone', bump);
+    })()
+'''
+
 
-@dataclass
+@dataclass(slots=True)
 class ElementInfo:
     """Information about a DOM element."""
     tag: str
     id: str = ""
-    classes: List[str] = field(default_factory=list)
+    classes: Sequence[str] = ()  # Shared empty default - no list per element
     text: str = ""
     href: str = ""
     src: str = ""
@@ -31,13 +128,27 @@ class ElementInfo:
     is_interactive: bool = False
     bounding_box: Optional[Dict[str, float]] = None
     index: int = 0
+    classes_joined: str = field(default="", init=False, repr=False, compare=False)
+    text_preview: str = field(default="", init=False, repr=False, compare=False)
+    _dict_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Derived once here; to_dict and keyword scoring both read them
+        self.classes_joined = " ".join(self.classes)
+        self.text_preview = self.text[:100]
     
     def to_dict(self) -> Dict[str, Any]:
+        # Elements don't change after capture, so build the dict once
+        if self._dict_cache is None:
+            self._dict_cache = self._build_dict()
+        return self._dict_cache
+    
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "tag": self.tag,
             "id": self.id,
-            "class": " ".join(self.classes),
-            "text": self.text[:100] if self.text else "",
+            "class": self.classes_joined,
+            "text": self.text_preview,
             "href": self.href,
             "placeholder": self.placeholder,
             "aria_label": self.aria_label,
@@ -70,40 +181,95 @@ class DOMSnapshot:
         'switch', 'slider', 'spinbutton', 'searchbox'
     }
     
+    __slots__ = (
+        'elements', 'page_info',
+        '_by_tag', '_interactive_elements', '_visible_text_parts', '_text_content',
+        '_by_id', '_by_class', '_by_index', '_by_role',
+        '_text_folded', '_text_exact', '_search_text', '_tick',
+        '__weakref__'  # Memory keeps weak references to snapshots
+    )
+    
     def __init__(self, elements: List[ElementInfo], page_info: Dict[str, Any]):
         self.elements = elements
         self.page_info = page_info
+        
+        # Everything the accessors need, bucketed in a single pass
+        self._by_tag: Dict[str, List[ElementInfo]] = {}  # Visible elements only
         self._interactive_elements: List[ElementInfo] = []
-        self._text_content: str = ""
+        self._visible_text_parts: List[str] = []
+        # find_element lookups: key -> position of the first matching element
+        self._by_id: Dict[str, int] = {}
+        self._by_class: Dict[str, int] = {}
+        self._by_index: Dict[int, int] = {}
+        self._by_role: Dict[str, int] = {}
+        for pos, el in enumerate(elements):
+            self._by_index.setdefault(el.index, pos)
+            if el.id:
+                self._by_id.setdefault(el.id, pos)
+            for cls_name in el.classes:
+                self._by_class.setdefault(cls_name, pos)
+            if el.role:
+                self._by_role.setdefault(el.role, pos)
+            
+            if not el.is_visible:
+                continue
+            self._by_tag.setdefault(el.tag, []).append(el)
+            if el.is_interactive:
+                self._interactive_elements.append(el)
+            if el.text:
+                self._visible_text_parts.append(el.text)
+        self._text_content: Optional[str] = None
+        # Casefolded texts and exact-text index, built on the first text query
+        self._text_folded: Optional[List[str]] = None
+        self._text_exact: Optional[Dict[str, List[int]]] = None
+        self._search_text: Optional[List[str]] = None  # Built on the first score()
+        # Page state the snapshot was taken at (None if the page has no DOM_TICK_SCRIPT)
+        self._tick: Optional[str] = None
         
     @classmethod
-    async def capture(cls, page: Page) -> 'DOMSnapshot':
+    async def capture(
+        cls,
+        page: Page,
+        top_n: Optional[int] = 200,
+        prev: Optional['DOMSnapshot'] = None
+    ) -> 'DOMSnapshot':
         """
         Capture a DOM snapshot from the current page.
         
         Args:
             page: Playwright page instance
+            top_n: Keep only the N highest-scoring elements (scored in the
+                   page, returned in document order); None keeps all
+            prev: Previous snapshot of this page, returned as-is if the DOM
+                  hasn't mutated (and the page hasn't scrolled) since
             
         Returns:
             DOMSnapshot instance
         """
-        # Get page info
-        page_info = {
-            "url": page.url,
-            "title": await page.title(),
-            "viewport": page.viewport_size
-        }
+        prev_tick = prev._tick if prev is not None else None
         
-        # Execute JavaScript to extract DOM information
-        elements_data = await page.evaluate('''
-            () => {
+        # Execute JavaScript to extract DOM information (and page info, so the
+        # whole snapshot costs a single round trip)
+        raw_snapshot = await page.evaluate('''
+            ([topN, prevTick]) => {
+                const SELECTOR = 'a, button, input, select, textarea, [role], [onclick], [tabindex], ' +
+                                 '[data-action], [data-click], h1, h2, h3, h4, h5, h6, p, li, td, th, label';
+                
+                // Same document, no mutations, same viewport: the caller's
+                // snapshot is still current, skip the extraction entirely
+                let tick = null;
+                if (window.__domTick !== undefined) {
+                    tick = [performance.timeOrigin, window.__domTick, window.scrollX, window.scrollY,
+                            window.innerWidth, window.innerHeight, topN].join(':');
+                    if (tick === prevTick) return null;
+                }
+                
                 const elements = [];
+                const scores = [];
                 const interactiveTags = new Set(['a', 'button', 'input', 'select', 'textarea', 'details', 'summary']);
                 const interactiveRoles = new Set(['button', 'link', 'menuitem', 'option', 'radio', 'checkbox', 'textbox', 'combobox', 'tab', 'switch']);
                 
-                function isVisible(el) {
-                    const style = window.getComputedStyle(el);
-                    const rect = el.getBoundingClientRect();
+                function isVisible(style, rect) {
                     return style.display !== 'none' && 
                            style.visibility !== 'hidden' && 
                            style.opacity !== '0' &&
@@ -140,9 +306,18 @@ class DOMSnapshot:
                     return text.trim().substring(0, 200);
                 }
                 
-                function extractElement(el, index) {
+                // Tiered pruning weight: labelled content first, bare containers last
+                function scoreElement(el, data) {
+                    const bareContainer = (data.tag === 'div' || data.tag === 'span') &&
+                                          !el.getAttribute('onclick') && !el.onclick;
+                    return 3 * !!data.text +
+                           2 * !!(data.ariaLabel || data.placeholder) +
+                           1 * data.isInteractive -
+                           1 * bareContainer;
+                }
+                
+                function extractElement(el, rect, style, index) {
                     const tag = el.tagName.toLowerCase();
-                    const rect = el.getBoundingClientRect();
                     
                     return {
                         tag: tag,
@@ -157,7 +332,7 @@ class DOMSnapshot:
                         role: el.getAttribute('role') || '',
                         type: el.type || '',
                         name: el.name || '',
-                        isVisible: isVisible(el),
+                        isVisible: isVisible(style, rect),
                         isEnabled: !el.disabled,
                         isInteractive: isInteractive(el),
                         boundingBox: {
@@ -170,79 +345,219 @@ class DOMSnapshot:
                     };
                 }
                 
-                // Get all potentially interesting elements
-                const selector = 'a, button, input, select, textarea, [role], [onclick], [tabindex], h1, h2, h3, h4, h5, h6, p, li, td, th, label, span, div';
-                const allElements = document.querySelectorAll(selector);
+                // Bare span/div only matter when they hold text directly (error
+                // messages, prices, snippets); find those from the text nodes
+                // instead of measuring every container on the page
+                const textHosts = new Set();
+                const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+                for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+                    const parent = node.parentElement;
+                    if (parent && (parent.tagName === 'SPAN' || parent.tagName === 'DIV') &&
+                        node.data.trim()) {
+                        textHosts.add(parent);
+                    }
+                }
                 
-                let index = 0;
+                // Get all potentially interesting elements, in document order.
+                // Span/div that act like controls match the [role], [onclick],
+                // [tabindex] or data-* hooks in SELECTOR
+                const allElements = [];
+                for (const el of document.querySelectorAll(SELECTOR + ', span, div')) {
+                    if ((el.tagName === 'SPAN' || el.tagName === 'DIV') && !textHosts.has(el) &&
+                        !el.matches(SELECTOR)) continue;
+                    allElements.push(el);
+                }
+                const viewportHeight = window.innerHeight;
+                
+                // Phase A - layout reads only: one rect and one computed style
+                // per candidate, taken together so layout is computed once
+                const candidates = [];
+                const rects = [];
+                const styles = [];
                 for (const el of allElements) {
                     // Skip hidden elements and very small elements
                     const rect = el.getBoundingClientRect();
                     if (rect.width < 5 || rect.height < 5) continue;
                     
                     // Skip elements outside viewport (with some margin)
-                    if (rect.bottom < -100 || rect.top > window.innerHeight + 100) continue;
+                    if (rect.bottom < -100 || rect.top > viewportHeight + 100) continue;
                     
-                    const data = extractElement(el, index);
+                    candidates.push(el);
+                    rects.push(rect);
+                    styles.push(window.getComputedStyle(el));
+                }
+                
+                // Phase B - build results from the cached measurements
+                let index = 0;
+                for (let i = 0; i < candidates.length; i++) {
+                    const el = candidates[i];
+                    const data = extractElement(el, rects[i], styles[i], index);
                     
                     // Only include if it has meaningful content or is interactive
                     if (data.isInteractive || data.text || data.placeholder || data.ariaLabel) {
                         elements.push(data);
+                        scores.push(scoreElement(el, data));
                         index++;
                     }
-                    
-                    // Limit total elements
-                    if (elements.length >= 200) break;
                 }
                 
-                return elements;
+                // Keep the top-scoring elements (stable on ties), then restore page order
+                let kept = elements;
+                if (topN !== null && elements.length > topN) {
+                    const order = elements.map((_, i) => i);
+                    order.sort((a, b) => scores[b] - scores[a]);
+                    kept = order.slice(0, topN).sort((a, b) => a - b).map(i => elements[i]);
+                }
+                
+                // One string crosses the bridge instead of ~200 nested objects
+                return JSON.stringify({
+                    url: location.href,
+                    title: document.title,
+                    tick: tick,
+                    elements: kept
+                });
             }
-        ''')
+        ''', [top_n, prev_tick])
+        if raw_snapshot is None:
+            return prev
+        
+        snapshot_data = _json_loads(raw_snapshot)
+        elements_data = snapshot_data["elements"]
+        
+        page_info = {
+            "url": snapshot_data["url"],
+            "title": snapshot_data["title"],
+            "viewport": page.viewport_size  # Local to the client, no round trip
+        }
         
         # Convert to ElementInfo objects
-        elements = []
+        interned = _INTERNED_TAGS
         for el_data in elements_data:
-            element = ElementInfo(
-                tag=el_data['tag'],
-                id=el_data['id'],
-                classes=el_data['classes'],
-                text=el_data['text'],
-                href=el_data['href'],
-                src=el_data['src'],
-                placeholder=el_data['placeholder'],
-                value=el_data['value'],
-                aria_label=el_data['ariaLabel'],
-                role=el_data['role'],
-                type=el_data['type'],
-                name=el_data['name'],
-                is_visible=el_data['isVisible'],
-                is_enabled=el_data['isEnabled'],
-                is_interactive=el_data['isInteractive'],
-                bounding_box=el_data['boundingBox'],
-                index=el_data['index']
-            )
-            elements.append(element)
+            tag = el_data["tag"]
+            el_data["tag"] = interned.get(tag, tag)
+        field_names = _JS_FIELD_NAMES
+        elements = [
+            ElementInfo(**{field_names.get(key, key): value for key, value in el_data.items()})
+            for el_data in elements_data
+        ]
+        
+        snapshot = cls(elements, page_info)
+        snapshot._tick = snapshot_data["tick"]
+        return snapshot
+    
+    @classmethod
+    async def capture_ax(cls, page: Page) -> 'DOMSnapshot':
+        """
+        Capture a snapshot from the browser's accessibility tree.
+        
+        Roles, names and visibility come from the browser engine instead of
+        the DOM walk heuristics. Pages with poor accessibility markup give
+        thin results, so callers should fall back to capture().
+        
+        Args:
+            page: Playwright page instance
+            
+        Returns:
+            DOMSnapshot instance
+        """
+        aria_yaml, title = await asyncio.gather(
+            page.locator("body").aria_snapshot(),
+            page.title()
+        )
+        
+        interactive_roles = cls.INTERACTIVE_ROLES
+        elements: List[ElementInfo] = []
+        for line in aria_yaml.splitlines():
+            stripped = line.lstrip()
+            if stripped.startswith("- /"):
+                # Property of the node above, e.g. `- /url: /about`
+                key, _, value = stripped[3:].partition(": ")
+                if key == "url" and elements:
+                    elements[-1].href = _ax_unquote(value)
+                continue
+            if stripped.startswith("- '"):
+                # YAML-quoted key (the name contains a colon or similar)
+                body = stripped[2:]
+                if body.endswith("'"):
+                    key, rest = body, ""
+                else:
+                    key, _, rest = body.rpartition("':")
+                    key, rest = key + "'", ":" + rest
+                line = "- " + _ax_unquote(key) + rest
+            
+            match = _AX_LINE.match(line)
+            if match is None:
+                continue
+            role = match["role"]
+            name = match["name"]
+            name = json.loads(f'"{name}"') if name else ""
+            text = _ax_unquote(match["text"]) if match["text"] else ""
+            attrs = dict(_AX_ATTR.findall(match["attrs"] or ""))
+            
+            if role == "text":
+                role, name, text = "", text, ""
+            is_interactive = role in interactive_roles
+            if not (name or text or is_interactive):
+                continue  # Bare structural node (list, generic, ...)
+            
+            tag = _AX_ROLE_TAGS.get(role, role or "text")
+            is_field = tag in ("input", "select")
+            elements.append(ElementInfo(
+                tag=tag,
+                text="" if is_field else (name or text),
+                value=text if is_field else "",
+                aria_label=name if is_field else "",
+                role=role,
+                is_enabled="disabled" not in attrs,
+                is_interactive=is_interactive,
+                index=len(elements)
+            ))
         
+        page_info = {
+            "url": page.url,
+            "title": title,
+            "viewport": page.viewport_size
+        }
         return cls(elements, page_info)
     
-    def get_interactive_elements(self) -> List[Dict[str, Any]]:
-        """Get only interactive elements for action selection."""
-        if not self._interactive_elements:
-            self._interactive_elements = [
-                el for el in self.elements
-                if el.is_interactive and el.is_visible
-            ]
+    def get_interactive_elements(
+        self,
+        limit: Optional[int] = None,
+        importance_filter: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Get only interactive elements for action selection.
+        
+        Args:
+            limit: Maximum number of elements to return
+            importance_filter: When truncating, keep the most informative
+                               elements instead of the first ones on the page
+        """
+        elements = self._get_interactive()
+        if limit is not None and len(elements) > limit:
+            if importance_filter:
+                # Pick the top-ranked elements but keep them in page order
+                elements = sorted(elements, key=self._importance, reverse=True)[:limit]
+                elements.sort(key=lambda el: el.index)
+            else:
+                elements = elements[:limit]
         
-        return [el.to_dict() for el in self._interactive_elements]
+        return [el.to_dict() for el in elements]
+    
+    def _get_interactive(self) -> List[ElementInfo]:
+        """Visible interactive elements, in page order."""
+        return self._interactive_elements
+    
+    @staticmethod
+    def _importance(element: ElementInfo) -> int:
+        """Rank elements with a usable label and enabled state first."""
+        labelled = bool(element.text or element.aria_label or element.placeholder or element.name)
+        return 2 * labelled + element.is_enabled
     
     def get_visible_text(self, max_length: int = 5000) -> str:
         """Get visible text content from the page."""
-        if not self._text_content:
-            texts = []
-            for el in self.elements:
-                if el.is_visible and el.text:
-                    texts.append(el.text)
-            self._text_content = " ".join(texts)
+        if self._text_content is None:
+            self._text_content = " ".join(self._visible_text_parts)
         
         return self._text_content[:max_length]
     
@@ -253,18 +568,44 @@ class DOMSnapshot:
         return {
             "page": self.page_info,
             "element_count": len(self.elements),
-            "interactive_count": len(self.get_interactive_elements()),
+            "interactive_count": len(self._get_interactive()),
             "elements_summary": self._create_elements_summary()
         }
     
+    def to_json_bytes(self) -> bytes:
+        """
+        Serialize the simplified representation plus the interactive
+        elements straight to compact JSON, for sending to the LLM.
+        """
+        payload = self.to_simplified_json()
+        payload["interactive_elements"] = [el.to_dict() for el in self._interactive_elements]
+        return _json_dumps_bytes(payload)
+    
+    def fingerprint(self) -> int:
+        """
+        Cheap content hash of the snapshot.
+        
+        Equal fingerprints mean the page looks the same to the agent, so
+        callers can skip work that only depends on the DOM.
+        """
+        state = (
+            self.page_info.get("url"),
+            [
+                (el.tag, el.id, el.text, el.value, el.href, el.is_visible, el.is_enabled)
+                for el in self.elements
+            ]
+        )
+        digest = hashlib.blake2b(repr(state).encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+    
     def _create_elements_summary(self) -> str:
         """Create a text summary of key elements."""
         lines = []
         
         # Group by type
-        inputs = [el for el in self.elements if el.tag == 'input' and el.is_visible]
-        buttons = [el for el in self.elements if el.tag == 'button' and el.is_visible]
-        links = [el for el in self.elements if el.tag == 'a' and el.is_visible]
+        inputs = self._by_tag.get('input', [])
+        buttons = self._by_tag.get('button', [])
+        links = self._by_tag.get('a', [])
         
         if inputs:
             lines.append(f"Input fields ({len(inputs)}):")
@@ -305,47 +646,106 @@ class DOMSnapshot:
         Returns:
             Matching ElementInfo or None
         """
-        for element in self.elements:
-            if index is not None and element.index == index:
-                return element
-            
-            if selector:
-                if selector.startswith('#') and element.id == selector[1:]:
-                    return element
-                if selector.startswith('.') and selector[1:] in element.classes:
-                    return element
-                    
-            if text and text.lower() in element.text.lower():
-                return element
-                
-            if role and element.role == role:
-                return element
+        # The first element (in page order) matching any of the criteria
+        candidates = []
+        if index is not None:
+            candidates.append(self._by_index.get(index))
+        if selector:
+            if selector.startswith('#'):
+                candidates.append(self._by_id.get(selector[1:]))
+            elif selector.startswith('.'):
+                candidates.append(self._by_class.get(selector[1:]))
+        if role:
+            candidates.append(self._by_role.get(role))
         
-        return None
+        best = min((pos for pos in candidates if pos is not None), default=len(self.elements))
+        
+        if text:
+            # Substring match has no index - scan, but only ahead of the best hit
+            needle = text.casefold()
+            folded = self._get_text_folded()
+            for pos in range(best):
+                if needle in folded[pos]:
+                    best = pos
+                    break
+        
+        return self.elements[best] if best < len(self.elements) else None
     
     def find_elements_by_text(self, text: str, exact: bool = False) -> List[ElementInfo]:
-        """Find all elements containing the given text."""
-        results = []
-        text_lower = text.lower()
+        """Find all visible elements containing the given text (case-insensitive)."""
+        needle = text.casefold()
+        folded = self._get_text_folded()
+        elements = self.elements
         
-        for element in self.elements:
-            if not element.is_visible:
-                continue
-                
-            element_text = element.text.lower()
-            if exact:
-                if element_text == text_lower:
-                    results.append(element)
-            else:
-                if text_lower in element_text:
-                    results.append(element)
+        if exact:
+            if self._text_exact is None:
+                self._text_exact = {}
+                for pos, el in enumerate(elements):
+                    if el.is_visible:
+                        self._text_exact.setdefault(folded[pos], []).append(pos)
+            return [elements[pos] for pos in self._text_exact.get(needle, ())]
         
-        return results
+        return [
+            elements[pos]
+            for pos, el_text in enumerate(folded)
+            if needle in el_text and elements[pos].is_visible
+        ]
+    
+    def _get_text_folded(self) -> List[str]:
+        """Casefolded element texts, aligned with self.elements."""
+        if self._text_folded is None:
+            self._text_folded = [el.text.casefold() for el in self.elements]
+        return self._text_folded
+    
+    def _get_search_text(self) -> List[str]:
+        """Casefolded text, aria-label and classes per element, aligned with self.elements."""
+        if self._search_text is None:
+            # Newlines keep a keyword from matching across two fields
+            self._search_text = [
+                f"{el.text}\n{el.aria_label}\n{el.classes_joined}".casefold()
+                for el in self.elements
+            ]
+        return self._search_text
+    
+    def score(self, keywords: List[str], weights: List[float]) -> List[float]:
+        """
+        Score every element by weighted keyword hits.
+        
+        Args:
+            keywords: Substrings to look for (case-insensitive) in each
+                      element's text, aria-label and classes
+            weights: Weight added for each keyword found, aligned with keywords
+            
+        Returns:
+            Scores aligned with self.elements
+        """
+        search_text = self._get_search_text()
+        scores = [0.0] * len(search_text)
+        # One pass per keyword over the precomputed strings
+        for keyword, weight in zip(keywords, weights):
+            needle = keyword.casefold()
+            for pos, haystack in enumerate(search_text):
+                if needle in haystack:
+                    scores[pos] += weight
+        return scores
+    
+    def top_scoring(
+        self,
+        keywords: List[str],
+        weights: List[float],
+        n: int
+    ) -> List[ElementInfo]:
+        """Get the n best-scoring elements for the keywords, highest score first."""
+        scores = self.score(keywords, weights)
+        best = heapq.nlargest(n, range(len(scores)), key=scores.__getitem__)
+        return [self.elements[pos] for pos in best]
     
     def get_form_fields(self) -> List[ElementInfo]:
         """Get all form input fields."""
-        form_tags = {'input', 'select', 'textarea'}
-        return [
-            el for el in self.elements
-            if el.tag in form_tags and el.is_visible
+        fields = [
+            el
+            for tag in ('input', 'select', 'textarea')
+            for el in self._by_tag.get(tag, [])
         ]
+        fields.sort(key=lambda el: el.index)
+        return fields
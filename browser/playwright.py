@@ -5,9 +5,13 @@ Browser Controller - Playwright-based browser automation.
 import asyncio
 import logging
 import base64
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, Deque, List, Tuple
 from pathlib import Path
 from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from .dom_parser import DOM_TICK_SCRIPT
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +42,8 @@ class BrowserController:
         self._browser: Optional[Browser] = None
         self._context: Optional[BrowserContext] = None
         self._page: Optional[Page] = None
+        # Recent (type, text) console messages and page errors, oldest first
+        self._console_ring: Deque[Tuple[str, str]] = deque(maxlen=256)
         
         self._screenshot_dir = Path("screenshots")
         self._screenshot_dir.mkdir(exist_ok=True)
@@ -47,6 +53,11 @@ class BrowserController:
         """Get the current page."""
         return self._page
     
+    @property
+    def screenshot_dir(self) -> Path:
+        """Directory screenshots are saved into."""
+        return self._screenshot_dir
+    
     @property
     def is_running(self) -> bool:
         """Check if browser is running."""
@@ -76,9 +87,12 @@ class BrowserController:
             context_options["user_agent"] = self.user_agent
             
         self._context = await self._browser.new_context(**context_options)
+        # Mutation counter for DOMSnapshot.capture, in every document from now on
+        await self._context.add_init_script(DOM_TICK_SCRIPT)
         
-        # Enable console logging from page
+        # Collect console messages and page errors from the page
         self._page = await self._context.new_page()
+        await self._page.evaluate(DOM_TICK_SCRIPT)  # The initial document predates it
         self._page.on("console", self._handle_console)
         self._page.on("pageerror", self._handle_page_error)
         
@@ -132,7 +146,8 @@ class BrowserController:
         self,
         path: str = None,
         full_page: bool = False,
-        return_base64: bool = True
+        return_base64: bool = False,
+        quality: Optional[int] = None
     ) -> Optional[str]:
         """
         Take a screenshot of the current page.
@@ -141,23 +156,43 @@ class BrowserController:
             path: Optional file path to save screenshot
             full_page: Whether to capture full scrollable page
             return_base64: Whether to return base64 encoded image
+            quality: JPEG quality (0-100) - much smaller than PNG for
+                     vision inputs; None keeps lossless PNG
             
         Returns:
             Base64 encoded screenshot if return_base64=True
         """
         if not self._page:
             return None
-            
-        screenshot_bytes = await self._page.screenshot(full_page=full_page)
         
-        if path:
-            save_path = self._screenshot_dir / path
-            save_path.write_bytes(screenshot_bytes)
+        options = {"full_page": full_page}
+        if quality is not None:
+            options.update(type="jpeg", quality=quality)
+        screenshot_bytes = await self._page.screenshot(**options)
+        
+        save_path = self._screenshot_dir / path if path else None
+        if save_path is None and not return_base64:
+            return None
+        
+        # Disk write and encoding of a full-page image would stall the event loop
+        encoded = await asyncio.to_thread(
+            self._store_screenshot, screenshot_bytes, save_path, return_base64
+        )
+        if save_path is not None:
             logger.debug(f"Screenshot saved to: {save_path}")
-            
-        if return_base64:
-            return base64.b64encode(screenshot_bytes).decode('utf-8')
-            
+        return encoded
+    
+    @staticmethod
+    def _store_screenshot(
+        data: bytes,
+        save_path: Optional[Path],
+        encode: bool
+    ) -> Optional[str]:
+        """Write screenshot bytes to disk and/or base64 encode them (runs in a worker thread)."""
+        if save_path is not None:
+            save_path.write_bytes(data)
+        if encode:
+            return base64.b64encode(data).decode('utf-8')
         return None
     
     async def get_page_content(self) -> str:
@@ -223,23 +258,43 @@ class BrowserController:
         except:
             pass  # Timeout is acceptable in some cases
             
-    async def _wait_for_stable(self, timeout: float = 2.0):
-        """Wait for page to become stable (no major changes)."""
-        await asyncio.sleep(0.5)  # Initial wait
+    async def _wait_for_stable(self, timeout: float = 2.0, quiet_ms: int = 150):
+        """Wait for page to become stable (no DOM mutations for quiet_ms)."""
+        # Resolves at once on a page that is already quiet (or has no
+        # DOM_TICK_SCRIPT to stamp mutations)
+        try:
+            await self._page.wait_for_function(
+                "quiet => performance.now() - (window.__lastMutation || 0) >= quiet",
+                arg=quiet_ms,
+                timeout=timeout * 1000,
+                polling=50
+            )
+        except PlaywrightTimeout:
+            logger.debug(f"Page still mutating after {timeout}s, moving on")
         
-        # Could implement more sophisticated stability detection here
-        # (e.g., comparing DOM snapshots)
+    def drain_console(self) -> List[Tuple[str, str]]:
+        """
+        Return and clear the buffered console messages and page errors.
+        
+        Only the most recent 256 events are kept between drains.
         
+        Returns:
+            (type, text) tuples, oldest first; page errors have type 'pageerror'
+        """
+        events = list(self._console_ring)
+        self._console_ring.clear()
+        return events
+    
     def _handle_console(self, msg):
         """Handle console messages from the page."""
-        if msg.type == "error":
-            logger.debug(f"Page console error: {msg.text}")
-        elif msg.type == "warning":
-            logger.debug(f"Page console warning: {msg.text}")
+        # Noisy pages log hundreds of messages a second; just buffer them
+        self._console_ring.append((msg.type, msg.text))
             
     def _handle_page_error(self, error):
         """Handle page errors."""
+        # Uncaught errors are rare and worth seeing - log them as well
         logger.warning(f"Page error: {error}")
+        self._console_ring.append(("pageerror", str(error)))
 
 
 class BrowserPool:
@@ -255,11 +310,23 @@ class BrowserPool:
         
     async def initialize(self):
         """Initialize the browser pool."""
-        for _ in range(self.pool_size):
-            browser = BrowserController(**self.browser_kwargs)
-            await browser.start()
+        browsers = [BrowserController(**self.browser_kwargs) for _ in range(self.pool_size)]
+        # Launch them side by side - startup is dominated by browser boot time
+        results = await asyncio.gather(
+            *(browser.start() for browser in browsers),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            # Don't leak the ones that did start (or got partway)
+            await asyncio.gather(
+                *(browser.close() for browser in browsers),
+                return_exceptions=True
+            )
+            raise errors[0]
+        for browser in browsers:
             self._browsers.append(browser)
-            await self._available.put(browser)
+            self._available.put_nowait(browser)
             
     async def acquire(self) -> BrowserController:
         """Acquire a browser from the pool."""
@@ -273,6 +340,11 @@ class BrowserPool:
         
     async def close_all(self):
         """Close all browsers in the pool."""
-        for browser in self._browsers:
-            await browser.close()
+        results = await asyncio.gather(
+            *(browser.close() for browser in self._browsers),
+            return_exceptions=True
+        )
         self._browsers.clear()
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to close pooled browser: {result}")